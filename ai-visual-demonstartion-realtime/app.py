@@ -1,16 +1,291 @@
-from flask import Flask, render_template, request, jsonify
-from video_processor import VideoDescriber
-from image_processor import ImageDescriber
+from flask import Flask, Response, render_template, request, jsonify
+from video_processor import DECODE_MODES, SAMPLING_MODES, video_info
+from image_processor import decode_image_bytes
 from translator import TextTranslator
-import hashlib
+from caption_cache import CaptionCache, FrameCaptionCache, perceptual_hash
+from jobs import JobManager
+from batcher import CaptionBatcher
+from inference_pool import InferencePool
+from model_registry import loaded_models
+from model_router import ModelRouter, parse_routes
+from singleflight import SingleFlight
+from uploads import SpoolingRequest, UploadTooLarge
+from segments import merge_captions, to_webvtt
+from realtime import ChannelRegistry
+from sampling import SamplingController
+from quality import MODEL_LATENCY_TARGETS, QUALITY_TIERS, QualityScheduler
+from metrics import stage, start_request, current_request, request_seconds, stage_seconds, gauge
+from functools import wraps
+import io
 import json
+import multiprocessing
 import os
-from werkzeug.utils import secure_filename
+import threading
+import time
 
 app = Flask(__name__)
-video_describer = VideoDescriber()
-image_describer = ImageDescriber()
-translator = TextTranslator()
+# Uploads are streamed to hashed spool files as they arrive, capped at MAX_UPLOAD_BYTES
+app.request_class = SpoolingRequest
+SpoolingRequest.spool_dir = os.environ.get('UPLOAD_SPOOL_DIR', 'spool')
+SpoolingRequest.max_upload_bytes = int(os.environ.get('MAX_UPLOAD_BYTES', str(2 * 1024 * 1024 * 1024)))
+app.config['MAX_CONTENT_LENGTH'] = SpoolingRequest.max_upload_bytes + 1024 * 1024
+# Number of worker processes used to caption long videos in parallel segments (0 = in-process)
+VIDEO_WORKERS = int(os.environ.get('VIDEO_WORKERS', '0'))
+# Captioning backend: torch (fp32), int8 (dynamically quantized) or onnx (ONNX Runtime)
+CAPTION_BACKEND = os.environ.get('CAPTION_BACKEND', 'torch')
+# INFERENCE_WORKERS > 0 moves live-frame inference into pinned worker processes
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+
+# Each endpoint's caption model, e.g. MODEL_ROUTES=describe=Salesforce/blip-image-captioning-base
+# to keep uploads on the small model; models not needed for live frames load on first use
+router = ModelRouter(parse_routes(os.environ.get('MODEL_ROUTES')), backend=CAPTION_BACKEND,
+                     video_workers=VIDEO_WORKERS)
+
+# The live model loads in the background (see load_models) so the server can bind its port at once
+frame_batcher = None
+models_ready = threading.Event()
+load_state = {"stage": "pending", "steps_done": 0, "steps_total": 0, "error": None,
+              "started": time.time(), "ready_after_seconds": None}
+
+def load_models():
+    global frame_batcher
+    steps = ["live caption model", "frame batcher"]
+    load_state["steps_total"] = len(steps)
+    try:
+        load_state["stage"] = steps[0]
+        if INFERENCE_WORKERS > 0:
+            frame_describer = InferencePool(
+                workers=INFERENCE_WORKERS,
+                intra_threads=int(os.environ['INFERENCE_THREADS']) if 'INFERENCE_THREADS' in os.environ else None,
+                inter_threads=int(os.environ.get('INFERENCE_INTEROP_THREADS', '1')),
+                model_name=router.model_for('describe_frame'),
+                backend=CAPTION_BACKEND
+            )
+            # The processes start at once, but each still has to load its own copy of the model
+            frame_describer.wait_ready()
+        else:
+            frame_describer = router.describer('describe_frame')
+        load_state["steps_done"] += 1
+
+        load_state["stage"] = steps[1]
+        # Concurrent /describe-frame requests arriving within the window share one generate call
+        frame_batcher = CaptionBatcher(
+            frame_describer,
+            max_batch_size=int(os.environ.get('BATCH_MAX_SIZE', '8')),
+            max_wait_ms=float(os.environ.get('BATCH_MAX_WAIT_MS', '20')),
+            # One batch per worker process in flight, so every pinned worker stays busy
+            max_in_flight=max(1, INFERENCE_WORKERS)
+        )
+        load_state["steps_done"] += 1
+
+        load_state["stage"] = "ready"
+        load_state["ready_after_seconds"] = round(time.time() - load_state["started"], 1)
+        models_ready.set()
+    except Exception as e:
+        load_state["stage"] = "failed"
+        load_state["error"] = str(e)
+        print(f"Model loading failed: {e}")
+
+def requires_models(view):
+    """Answer 503 straight away while the models are still loading instead of hanging the request"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not models_ready.is_set():
+            response = jsonify({"error": "Models are still loading", "stage": load_state["stage"]})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        return view(*args, **kwargs)
+    return wrapper
+
+def requires_route(endpoint):
+    """requires_models, plus a quick 503 while the endpoint's routed model loads in the background"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not router.ready(endpoint):
+                router.load_in_background(endpoint)
+                response = jsonify({"error": f"Model {router.model_for(endpoint)} is still loading",
+                                    "stage": router.status()[endpoint]["state"]})
+                response.headers['Retry-After'] = '10'
+                return response, 503
+            return view(*args, **kwargs)
+        return requires_models(wrapper)
+    return decorator
+
+# Share of stream time that captioning may use; live streams and adaptive video sampling pace themselves to it
+SAMPLING_BUDGET = float(os.environ.get('SAMPLING_BUDGET', '0.5'))
+
+# Server state, created by start_services() in the server process only
+translator = caption_cache = frame_cache = None
+inflight = jobs = channels = quality = None
+
+def start_services():
+    """Open the caches and start the job workers the request handlers share"""
+    global translator, caption_cache, frame_cache, inflight, jobs, channels, quality
+    # TRANSLATOR_BACKEND=local skips the network (texts come back untranslated), e.g. for tests or offline use
+    translator = TextTranslator(
+        backend=os.environ.get('TRANSLATOR_BACKEND', 'google'),
+        cache=CaptionCache(db_path=os.environ.get('TRANSLATION_CACHE_PATH', 'translation_cache.db'),
+                           max_memory_entries=4096, max_disk_bytes=64 * 1024 * 1024)
+    )
+    caption_cache = CaptionCache(
+        db_path=os.environ.get('CAPTION_CACHE_PATH', 'caption_cache.db'),
+        max_memory_entries=int(os.environ.get('CAPTION_CACHE_ENTRIES', '512')),
+        max_disk_bytes=int(os.environ.get('CAPTION_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    )
+    # Near-duplicate live frames (same scene from a still camera) reuse the session's recent caption
+    frame_cache = FrameCaptionCache(
+        max_distance=int(os.environ.get('FRAME_CACHE_MAX_DISTANCE', '6')),
+        ttl_seconds=float(os.environ.get('FRAME_CACHE_TTL', '10'))
+    )
+    # Identical uploads (same cache key) arriving together share one computation
+    inflight = SingleFlight()
+    jobs = JobManager(
+        workers=int(os.environ.get('JOB_WORKERS', '2')),
+        results_dir=os.environ.get('JOB_RESULTS_DIR', 'jobs'),
+        retention_seconds=float(os.environ.get('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+    )
+    # Realtime sessions: the client pushes frames, the server captions only the newest one
+    channels = ChannelRegistry(idle_seconds=float(os.environ.get('REALTIME_IDLE_SECONDS', '60')))
+    # Image uploads drop to cheaper quality tiers while uploads queue up or p95 latency climbs;
+    # the latency marks default to the targets of the model uploads are routed to
+    high_p95, low_p95 = MODEL_LATENCY_TARGETS.get(router.model_for('describe'), (3.0, 1.0))
+    quality = QualityScheduler(
+        lambda: jobs.depth() + inflight.stats()["in_flight"],
+        top_tier=os.environ.get('QUALITY_TOP_TIER', 'standard'),
+        high_depth=int(os.environ.get('QUALITY_HIGH_DEPTH', '4')),
+        high_p95=float(os.environ.get('QUALITY_HIGH_P95', str(high_p95))),
+        low_p95=float(os.environ.get('QUALITY_LOW_P95', str(low_p95)))
+    )
+
+# Spawned worker processes (video segments, inference pool) re-import this module;
+# only the real server process opens the caches, starts job threads and loads models
+if multiprocessing.parent_process() is None:
+    start_services()
+    threading.Thread(target=load_models, name="model-loader", daemon=True).start()
+
+def embedding_stats():
+    describer = router.loaded('describe_variants')
+    return describer.embedding_cache.stats() if describer else None
+
+def is_error(description):
+    """Failures come back as 'Error: ...' strings (or 'Frame N: Error: ...') and must not be cached"""
+    items = description if isinstance(description, list) else [description]
+    return any("Error:" in str(item) or "Translation error:" in str(item) for item in items)
+
+def request_upload_settings(filename):
+    """Work out how to describe an upload: ('image' | 'video', settings), or (None, error message)"""
+    if filename.endswith(('.jpg', '.png')):
+        # Only top-tier captions are cached, so the key names that tier
+        top_tier = quality.top_tier
+        return 'image', {"quality": top_tier.name, "max_new_tokens": top_tier.max_new_tokens,
+                         "backend": CAPTION_BACKEND}
+    if filename.endswith(('.mp4', '.avi')):
+        mode = request.form.get('mode', 'interval')
+        if mode not in SAMPLING_MODES:
+            return None, f"Unknown mode: {mode}"
+        decode = request.form.get('decode', 'sequential')
+        if decode not in DECODE_MODES:
+            return None, f"Unknown decode mode: {decode}"
+        # frames: 'Frame N: caption' list, segments: merged timed captions + WebVTT (vtt returns only the track)
+        output = request.form.get('output', 'frames')
+        if output not in ('frames', 'segments', 'vtt'):
+            return None, f"Unknown output: {output}"
+        settings = {"mode": mode, "decode": decode, "frame_interval": 30, "max_new_tokens": 30,
+                    "backend": CAPTION_BACKEND, "output": 'frames' if output == 'frames' else 'segments'}
+        if mode == 'adaptive':
+            settings["budget"] = request.form.get('budget', SAMPLING_BUDGET, type=float)
+            if settings["budget"] <= 0:
+                return None, "budget must be a positive number"
+        return 'video', settings
+    return None, "Unsupported format"
+
+def upload_source(file):
+    """Spool path of a large upload, or the in-memory stream of a small one"""
+    file.stream.seek(0)
+    return file.stream.path or file.stream
+
+def translate_description(description, lang):
+    """Translate a caption, a 'Frame N: caption' list or a segments dict with one batched call"""
+    if isinstance(description, dict):
+        texts = translator.translate([segment["text"] for segment in description["segments"]], lang)
+        if isinstance(texts, str):  # Translation error, reported like the other shapes so it is never cached
+            return texts
+        segments = [dict(segment, text=text) for segment, text in zip(description["segments"], texts)]
+        return dict(description, segments=segments)
+    if isinstance(description, list) and all(item.startswith("Frame ") for item in description):
+        # Translate only the captions so repeated captions are deduplicated across frames
+        labels, captions = zip(*(item.split(": ", 1) for item in description))
+        texts = translator.translate(list(captions), lang)
+        if isinstance(texts, str):
+            return texts
+        return [f"{label}: {text}" for label, text in zip(labels, texts)]
+    return translator.translate(description, lang)
+
+def finish_description(description, lang, cache_key, cache=True):
+    """Translate a fresh description if needed and remember it in the cache"""
+    if lang != 'en' and description:
+        with stage("translate"):
+            description = translate_description(description, lang)
+    if isinstance(description, dict):
+        description["vtt"] = to_webvtt(description["segments"])
+
+    if cache and description and not is_error(description):
+        caption_cache.set(cache_key, description)
+    return description
+
+def describe_upload(kind, source, lang, settings, cache_key, progress_callback=None):
+    """Describe an image (path or stream) or video (path) upload; the caller cleans up the source.
+
+    Returns (description, details): details holds the response fields that go with
+    it, the quality "tier" of an image or the adaptive "sampling" stats of a video.
+    """
+    if kind == 'image':
+        # Resolve the describer first so a lazy model load never counts as caption latency
+        describer = router.describer('describe')
+        tier = quality.current()
+        started = time.monotonic()
+        description = describer.describe_image(source, tier)
+        quality.record(time.monotonic() - started)
+        # A degraded caption is not cached, it would outlive the load that caused it
+        return finish_description(description, lang, cache_key, cache=tier is quality.top_tier), {"tier": tier.name}
+
+    video_describer = router.video_describer('describe')
+    options = dict(frame_interval=settings["frame_interval"], mode=settings["mode"], decode=settings["decode"],
+                   progress_callback=progress_callback)
+    sampler = None
+    if settings["mode"] == 'adaptive':
+        sampler = SamplingController(video_describer.image_describer.latency, settings["budget"])
+        options["controller"] = sampler
+    if settings["output"] == 'segments':
+        captions = video_describer.caption_video(source, **options)
+        fps, total_frames = video_info(source)
+        description = {"fps": fps, "segments": merge_captions(captions, fps, total_frames)}
+    else:
+        description = video_describer.describe_video(source, **options)
+    details = {"sampling": sampler.stats()} if sampler else {}
+    return finish_description(description, lang, cache_key), details
+
+def run_upload_job(job, kind, source, lang, settings, cache_key):
+    def on_progress(frames_done, total_frames, new_descriptions):
+        job.report(frames_done / total_frames if total_frames else None, new_descriptions)
+    try:
+        # Progress goes through inflight, so jobs that joined this computation are updated too
+        publish = lambda *update: inflight.publish(cache_key, *update)
+        description, details = inflight.do(
+            cache_key, lambda: describe_upload(kind, source, lang, settings, cache_key, publish), on_progress)
+        with job.changed:
+            job.tier = details.get("tier")
+            job.sampling = details.get("sampling")
+        return description
+    finally:
+        if isinstance(source, str) and os.path.exists(source):
+            os.remove(source)
+
+def run_cached_job(job, description, tier):
+    with job.changed:
+        job.tier = tier
+    return description
 
 # Route to serve the HTML page
 @app.route('/')
@@ -19,53 +294,355 @@ def index():
 
 # Your existing describe and describe-frame routes
 @app.route('/describe', methods=['POST'])
+@requires_route('describe')
 def describe():
-    file = request.files.get('file')
+    with stage("upload"):
+        file = request.files.get('file')
     if not file:
         return jsonify({"error": "No file provided"}), 400
 
     lang = request.form.get('lang', 'en')
+    kind, settings = request_upload_settings(file.filename)
+    if kind is None:
+        return jsonify({"error": settings}), 400
+
+    # The hash was computed while the upload streamed in
+    file_hash = file.stream.hexdigest()
+    cache_key = CaptionCache.make_key(file_hash, router.model_for('describe'), settings, lang)
+    with stage("cache_lookup"):
+        description = caption_cache.get(cache_key)
+    # Only top-tier image captions are cached
+    details = {"tier": quality.top_tier.name} if kind == 'image' else {}
+    if description is None:
+        source = upload_source(file)
+        publish = lambda *update: inflight.publish(cache_key, *update)  # For jobs that join this computation
+        description, details = inflight.do(
+            cache_key, lambda: describe_upload(kind, source, lang, settings, cache_key, publish))
+    if request.form.get('output') == 'vtt' and isinstance(description, dict):
+        return Response(description["vtt"], mimetype='text/vtt')
+    return jsonify(dict(details, description=description))
+
+@app.route('/describe-variants', methods=['POST'])
+@requires_route('describe_variants')
+def describe_variants():
+    """Caption one image under several prompts and lengths, reusing its cached vision embedding"""
+    file = request.files.get('file')
+    if not file:
+        return jsonify({"error": "No file provided"}), 400
+
     file_bytes = file.read()
-    file_hash = hashlib.md5(file_bytes).hexdigest()
-    file.seek(0)
-
-    description = None
-    if file.filename.endswith(('.jpg', '.png')):
-        description = image_describer.describe_image(file)
-    elif file.filename.endswith(('.mp4', '.avi')):
-        temp_path = f"temp_{secure_filename(file.filename)}"
-        file.save(temp_path)
-        description = video_describer.describe_video(temp_path)
-        os.remove(temp_path)
+    image = decode_image_bytes(file_bytes)
+    if image is None:
+        return jsonify({"error": "Invalid image"}), 400
+
+    lang = request.form.get('lang', 'en')
+    prompts = request.form.getlist('prompt') or [""]
+    try:
+        lengths = [int(n) for n in request.form.getlist('max_new_tokens')] or [30]
+    except ValueError:
+        return jsonify({"error": "max_new_tokens must be integers"}), 400
+    if any(n < 1 or n > 100 for n in lengths):
+        return jsonify({"error": "max_new_tokens must be between 1 and 100"}), 400
+
+    variants = router.describer('describe_variants').describe_variants(image, prompts, lengths,
+                                                                       image_key=file.stream.hexdigest())
+    if lang != 'en':
+        for variant in variants:
+            variant["translated_description"] = translator.translate(variant["description"], lang)
+    return jsonify({"variants": variants})
+
+@app.route('/jobs', methods=['POST'])
+@requires_route('describe')
+def create_job():
+    """Queue an upload for background description and return its job id at once"""
+    file = request.files.get('file')
+    if not file:
+        return jsonify({"error": "No file provided"}), 400
+
+    lang = request.form.get('lang', 'en')
+    kind, settings = request_upload_settings(file.filename)
+    if kind is None:
+        return jsonify({"error": settings}), 400
+
+    cache_key = CaptionCache.make_key(file.stream.hexdigest(), router.model_for('describe'), settings, lang)
+    cached = caption_cache.get(cache_key)
+    if cached is not None:
+        # Only top-tier image captions are cached
+        job = jobs.submit(run_cached_job, cached, quality.top_tier.name if kind == 'image' else None)
     else:
-        return jsonify({"error": "Unsupported format"}), 400
+        if file.stream.path:
+            source = file.stream.keep()  # The job deletes the spool file when it is done
+        else:
+            source = io.BytesIO(file.stream.getvalue())
+        job = jobs.submit(run_upload_job, kind, source, lang, settings, cache_key)
 
-    if lang != 'en' and description:
-        description = translator.translate(description, lang)
+    return jsonify({"job_id": job.id, "status_url": f"/jobs/{job.id}"}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    state = jobs.get(job_id)
+    if state is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(state)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream of progress and new per-frame captions until the job finishes"""
+    job = jobs.get_job(job_id)
+    if job is None:
+        state = jobs.get(job_id)
+        if state is None:
+            return jsonify({"error": "Unknown job"}), 404
+        return Response(f"data: {json.dumps(state)}\n\n", mimetype='text/event-stream')
 
-    return jsonify({"description": description})
+    def stream():
+        sent = 0
+        while True:
+            version = job.version  # Read first, so a change while we send is not waited out
+            state = job.to_dict()
+            event = {"status": state["status"], "progress": state["progress"], "partial": state["partial"][sent:]}
+            sent = len(state["partial"])
+            if state["status"] in ("done", "failed"):
+                event.update(result=state["result"], error=state["error"], tier=state["tier"],
+                             sampling=state["sampling"])
+                yield f"data: {json.dumps(event)}\n\n"
+                return
+            yield f"data: {json.dumps(event)}\n\n"
+            job.wait_for_change(15, version)
+
+    return Response(stream(), mimetype='text/event-stream')
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "captions": caption_cache.stats(),
+        "frames": frame_cache.stats(),
+        "inflight": inflight.stats(),
+        "realtime": channels.stats(),
+        "embeddings": embedding_stats()
+    })
+
+@app.errorhandler(UploadTooLarge)
+def upload_too_large(e):
+    return jsonify({"error": str(e)}), 413
+
+@app.teardown_request
+def remove_spooled_uploads(exc):
+    request.discard_spools()
+
+@app.before_request
+def start_timings():
+    start_request()
+
+@app.after_request
+def add_server_timing(response):
+    """Per-request stage breakdown in a Server-Timing header (streamed bodies only count up to the first byte)"""
+    timings = current_request()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
+        request_seconds.observe((request.endpoint or "unknown",), timings.elapsed())
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms, cache hit rates, queue depths and model memory in Prometheus text format"""
+    caches = {"captions": caption_cache.stats(), "frames": frame_cache.stats(),
+              "translations": translator.cache.stats() if translator.cache else None,
+              "embeddings": embedding_stats()}
+    caches = {name: stats for name, stats in caches.items() if stats}
+    queues = {"jobs": jobs.depth(), "batcher": frame_batcher.depth() if frame_batcher else None}
+    if frame_batcher and isinstance(frame_batcher.describer, InferencePool):
+        queues["inference_pool"] = frame_batcher.describer.depth()
+    models = loaded_models()
+    realtime = channels.stats()
+
+    lines = stage_seconds.render() + request_seconds.render()
+    lines += gauge("caption_cache_hits_total", "Cache hits", {n: c["hits"] for n, c in caches.items()},
+                   "cache", "counter")
+    lines += gauge("caption_cache_misses_total", "Cache misses", {n: c["misses"] for n, c in caches.items()},
+                   "cache", "counter")
+    lines += gauge("caption_cache_hit_ratio", "Share of lookups answered from the cache",
+                   {n: round(c["hits"] / (c["hits"] + c["misses"]), 4) if c["hits"] + c["misses"] else 0.0
+                    for n, c in caches.items()}, "cache")
+    lines += gauge("caption_queue_depth", "Items waiting in each queue", queues, "queue")
+    lines += gauge("caption_inflight_coalesced_total", "Uploads that shared an identical in-flight computation",
+                   inflight.stats()["coalesced"], metric_type="counter")
+    lines += gauge("caption_realtime_frames_dropped_total", "Stale realtime frames replaced before captioning",
+                   realtime["dropped"], metric_type="counter")
+    lines += gauge("caption_model_parameter_bytes", "Parameter and buffer bytes of each loaded model",
+                   {name: m["parameter_bytes"] for name, m in models.items()}, "model")
+    lines += gauge("caption_model_rss_delta_bytes", "Process RSS growth while each model loaded",
+                   {name: m["rss_delta_bytes"] for name, m in models.items()}, "model")
+    quality_stats = quality.stats()
+    lines += gauge("caption_quality_tier", "1 for the quality tier image uploads currently get",
+                   {tier.name: int(tier.name == quality_stats["tier"]) for tier in QUALITY_TIERS}, "tier")
+    lines += gauge("caption_quality_steps_total", "Quality tier changes under load",
+                   {"down": quality_stats["steps_down"], "up": quality_stats["steps_up"]}, "direction", "counter")
+    lines += gauge("caption_models_ready", "1 once every model has loaded", int(models_ready.is_set()))
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving, whether or not models have loaded"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once the live model is loaded, 503 with loading progress until then.
+
+    routes shows which other models are loaded; they load on their endpoint's first request.
+    """
+    state = dict(load_state, elapsed_seconds=round(time.time() - load_state["started"], 1),
+                 routes=router.status())
+    return jsonify(state), 200 if models_ready.is_set() else 503
+
+@app.route('/models', methods=['GET'])
+def models():
+    return jsonify(loaded_models())
+
+@app.route('/models/report', methods=['GET'])
+def models_report():
+    """Which model serves each endpoint, with its rolling latency and memory, to compare the routed models"""
+    return jsonify(router.report())
 
 @app.route('/describe-frame', methods=['POST'])
+@requires_models
 def describe_frame():
-    frame = request.files.get('frame')
+    with stage("upload"):
+        frame = request.files.get('frame')
+        data = frame.read() if frame else None
     if not frame:
         return jsonify({"error": "No frame provided"}), 400
 
     lang = request.form.get('lang', 'en')
-    temp_path = "temp_frame.jpg"
-    frame.save(temp_path)
-    description = image_describer.describe_image(temp_path)
-    os.remove(temp_path)
-
-    translated_description = description
-    if lang != 'en':
-        translated_description = translator.translate(description, lang)
+    with stage("image_decode"):
+        image = decode_image_bytes(data)
+    if image is None:
+        return jsonify({"error": "Invalid image"}), 400
+    session_id = request.form.get('session') or request.remote_addr
+    description, translated_description = caption_live_frame(session_id, image, lang)
 
     return jsonify({
         "description": description,
         "translated_description": translated_description
     })
 
+def caption_live_frame(session_id, image, lang):
+    """Caption a live frame, reusing the session's caption for a near-identical frame"""
+    with stage("cache_lookup"):
+        frame_hash = perceptual_hash(image)
+        description = frame_cache.get(session_id, frame_hash)
+    if description is None:
+        # Preprocessing and generate run on the batcher thread, so this covers queueing plus the batch
+        with stage("inference"):
+            description = frame_batcher.describe(image)
+        if not is_error(description):
+            frame_cache.put(session_id, frame_hash, description)
+
+    translated_description = description
+    if lang != 'en':
+        with stage("translate"):
+            translated_description = translator.translate(description, lang)
+    return description, translated_description
+
+@app.route('/realtime/<session_id>/frames', methods=['POST'])
+@requires_models
+def push_realtime_frame(session_id):
+    """Hand a frame to the session; an older frame still waiting to be captioned is dropped"""
+    frame = request.files.get('frame')
+    if not frame:
+        return jsonify({"error": "No frame provided"}), 400
+    frame_id = request.form.get('frame_id', type=int)
+    frame_id, dropped = channels.get(session_id).push(frame.read(), frame_id)
+    return jsonify({"frame_id": frame_id, "dropped": dropped}), 202
+
+@app.route('/realtime/<session_id>/events', methods=['GET'])
+@requires_models
+def realtime_events(session_id):
+    """Server-Sent Events for each processed frame, tagged with its frame_id.
+
+    Each event carries the full and translated caption plus the sampling rate that
+    keeps this stream within its inference budget (?budget=, default
+    SAMPLING_BUDGET); clients pace their frames to it. Frames are captioned through
+    the shared batcher (and the inference pool when enabled). Reopening the stream,
+    e.g. on a language change, closes the previous one for the session.
+    """
+    lang = request.args.get('lang', 'en')
+    budget = request.args.get('budget', SAMPLING_BUDGET, type=float)
+    if budget <= 0:
+        return jsonify({"error": "budget must be a positive number"}), 400
+    channel = channels.get(session_id)
+    sampler = SamplingController(frame_batcher.describer.latency, budget)
+    generation = channel.attach()
+
+    def stream():
+        with channel.changed:
+            channel.listeners += 1
+        try:
+            while True:
+                frame = channel.take(timeout=15, generation=generation)
+                if channel.generation != generation:
+                    break
+                if frame is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                frame_id, data = frame
+                image = decode_image_bytes(data)
+                if image is None:
+                    event = {"error": "Invalid image"}
+                else:
+                    description, translated_description = caption_live_frame(session_id, image, lang)
+                    event = {"description": description, "translated_description": translated_description}
+                event["frame_id"] = frame_id
+                event["dropped"] = channel.dropped
+                event["sampling"] = sampler.stats()
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            with channel.changed:
+                channel.listeners -= 1
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/describe-frame/stream', methods=['POST'])
+@requires_route('describe_frame')
+def describe_frame_stream():
+    """Stream the caption as Server-Sent Events: {"token"} pieces, then the full and translated caption"""
+    frame = request.files.get('frame')
+    if not frame:
+        return jsonify({"error": "No frame provided"}), 400
+
+    lang = request.form.get('lang', 'en')
+    image = decode_image_bytes(frame.read())
+    if image is None:
+        return jsonify({"error": "Invalid image"}), 400
+    session_id = request.form.get('session') or request.remote_addr
+
+    def stream():
+        for event in stream_live_frame(session_id, image, lang):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def stream_live_frame(session_id, image, lang):
+    """Yield {"token"} events as the caption is decoded, then the full and translated caption"""
+    frame_hash = perceptual_hash(image)
+    description = frame_cache.get(session_id, frame_hash)
+    if description is None:
+        pieces = []
+        for piece in router.describer('describe_frame').stream_frame(image):
+            pieces.append(piece)
+            yield {"token": piece}
+        description = "".join(pieces).strip()
+        if not is_error(description):
+            frame_cache.put(session_id, frame_hash, description)
+    else:
+        yield {"token": description}
+
+    translated_description = description
+    if lang != 'en':
+        translated_description = translator.translate(description, lang)
+    yield {"description": description, "translated_description": translated_description}
+
 
 
 if __name__ == "__main__":
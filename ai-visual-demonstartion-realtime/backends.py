@@ -0,0 +1,225 @@
+import math
+import os
+import shutil
+import tempfile
+import numpy as np
+import torch
+from transformers import BlipProcessor, BlipForConditionalGeneration
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_DIR = os.environ.get("ONNX_MODEL_DIR", "onnx_models")
+# Weights saved here (e.g. models/Salesforce--blip-image-captioning-base) are used instead of the hub
+LOCAL_MODEL_DIR = os.environ.get("LOCAL_MODEL_DIR", "models")
+
+def pretrained_source(model_name):
+    """Local directory holding model_name's weights if there is one, otherwise the hub name"""
+    local_path = os.path.join(LOCAL_MODEL_DIR, model_name.replace("/", "--"))
+    if os.path.isfile(os.path.join(local_path, "config.json")):
+        return local_path
+    return model_name
+
+class _VisionEncoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.vision_model = model.vision_model
+
+    def forward(self, pixel_values):
+        return self.vision_model(pixel_values=pixel_values, return_dict=False)[0]
+
+class _TextDecoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.text_decoder = model.text_decoder
+
+    def forward(self, input_ids, attention_mask, encoder_hidden_states):
+        return self.text_decoder(input_ids=input_ids, attention_mask=attention_mask,
+                                 encoder_hidden_states=encoder_hidden_states,
+                                 use_cache=False, return_dict=False)[0]
+
+class OnnxBlipCaptioner:
+    """BLIP captioning on ONNX Runtime: exported vision encoder plus a greedy loop over the exported text decoder.
+
+    generate() takes the same pixel_values the processor produces and returns
+    token ids, so ImageDescriber can use it in place of the torch model. The
+    decoder is exported without past key/values, so every step reruns the whole
+    prefix; fine for short captions, quadratic in caption length.
+    """
+
+    def __init__(self, model_name, model, export_dir):
+        text_config = model.config.text_config
+        self.bos_token_id = text_config.bos_token_id
+        self.eos_token_id = text_config.sep_token_id
+        self.pad_token_id = text_config.pad_token_id
+
+        vision_path = os.path.join(export_dir, "vision_encoder.onnx")
+        decoder_path = os.path.join(export_dir, "text_decoder.onnx")
+        if not (os.path.exists(vision_path) and os.path.exists(decoder_path)):
+            self._export(model, export_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        providers = ["CPUExecutionProvider"]
+        self.vision = ort.InferenceSession(vision_path, options, providers=providers)
+        self.decoder = ort.InferenceSession(decoder_path, options, providers=providers)
+        self.nbytes = os.path.getsize(vision_path) + os.path.getsize(decoder_path)
+
+    @staticmethod
+    def _export(model, export_dir):
+        """Export into a scratch directory and move it into place, so concurrent workers never load half a file"""
+        parent = os.path.dirname(os.path.abspath(export_dir))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".export-", dir=parent)
+        try:
+            OnnxBlipCaptioner._export_graphs(model, os.path.join(staging, "vision_encoder.onnx"),
+                                             os.path.join(staging, "text_decoder.onnx"))
+            try:
+                os.replace(staging, export_dir)
+            except OSError:
+                if not os.path.isdir(export_dir):
+                    raise
+                # Another worker moved its export into place first; use that one
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _export_graphs(model, vision_path, decoder_path):
+        size = model.config.vision_config.image_size
+        pixel_values = torch.zeros(1, 3, size, size)
+        with torch.no_grad():
+            torch.onnx.export(_VisionEncoder(model).eval(), (pixel_values,), vision_path,
+                              input_names=["pixel_values"], output_names=["image_embeds"],
+                              dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+                              opset_version=14)
+            image_embeds = model.vision_model(pixel_values=pixel_values)[0]
+            input_ids = torch.ones(1, 2, dtype=torch.long)
+            torch.onnx.export(_TextDecoder(model).eval(), (input_ids, torch.ones_like(input_ids), image_embeds),
+                              decoder_path,
+                              input_names=["input_ids", "attention_mask", "encoder_hidden_states"],
+                              output_names=["logits"],
+                              dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                                            "attention_mask": {0: "batch", 1: "sequence"},
+                                            "encoder_hidden_states": {0: "batch"},
+                                            "logits": {0: "batch", 1: "sequence"}},
+                              opset_version=14)
+
+    def encode(self, pixel_values):
+        return self.vision.run(None, {"pixel_values": pixel_values.cpu().numpy().astype(np.float32)})[0]
+
+    def generate(self, pixel_values=None, max_new_tokens=30, image_embeds=None, input_ids=None,
+                 streamer=None, **kwargs):
+        if image_embeds is None:
+            image_embeds = self.encode(pixel_values)
+        batch_size = image_embeds.shape[0]
+        if input_ids is None:
+            ids = np.full((batch_size, 1), self.bos_token_id, dtype=np.int64)
+        else:
+            ids = np.asarray(input_ids, dtype=np.int64)
+        finished = np.zeros(batch_size, dtype=bool)
+        if streamer is not None:
+            streamer.put(torch.from_numpy(ids[0]))  # The prompt, skipped by the streamer like in HF generate
+
+        for _ in range(max_new_tokens):
+            logits = self.decoder.run(None, {"input_ids": ids,
+                                             "attention_mask": np.ones_like(ids),
+                                             "encoder_hidden_states": image_embeds})[0]
+            next_ids = np.where(finished, self.pad_token_id, logits[:, -1].argmax(-1))
+            ids = np.concatenate([ids, next_ids[:, None]], axis=1)
+            finished |= next_ids == self.eos_token_id
+            if streamer is not None:
+                streamer.put(torch.from_numpy(next_ids[:1]))
+            if finished.all():
+                break
+        if streamer is not None:
+            streamer.end()
+        return torch.from_numpy(ids)
+
+def load_backend(backend, model_name, device="cpu"):
+    """Load processor and captioning model for one of BACKENDS; the model always exposes generate()"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    source = pretrained_source(model_name)
+    processor = BlipProcessor.from_pretrained(source)
+    model = BlipForConditionalGeneration.from_pretrained(source).to(device)
+    model.eval()
+
+    if backend == "int8":
+        if device != "cpu":
+            raise ValueError("int8 dynamic quantization only runs on cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == "onnx":
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed, pip install onnxruntime to use the onnx backend")
+        export_dir = os.path.join(ONNX_DIR, model_name.replace("/", "--"))
+        model = OnnxBlipCaptioner(model_name, model, export_dir)
+    if backend != "onnx":
+        model.vision_model.embeddings.register_forward_hook(_resize_position_embeddings)
+    return processor, model
+
+def _resize_position_embeddings(embeddings, inputs, output):
+    """Forward hook letting BLIP's vision encoder take inputs smaller than it was trained on.
+
+    BlipVisionEmbeddings adds the first N rows of its position table, which
+    only lines up at the native resolution; swap them for the patch grid
+    bicubically resampled to the actual (square) input size.
+    """
+    position = embeddings.position_embedding
+    count = output.shape[1]
+    if count == position.shape[1]:
+        return output
+    side = int(math.sqrt(position.shape[1] - 1))
+    new_side = int(math.sqrt(count - 1))
+    grid = position[:, 1:].reshape(1, side, side, -1).permute(0, 3, 1, 2)
+    grid = torch.nn.functional.interpolate(grid.float(), size=(new_side, new_side), mode="bicubic", align_corners=False)
+    resized = torch.cat([position[:, :1], grid.permute(0, 2, 3, 1).reshape(1, count - 1, -1).to(position.dtype)], dim=1)
+    return output + (resized - position[:, :count]).to(output.dtype)
+
+def encode_image(model, pixel_values):
+    """Run only the vision encoder, returning image embeddings as a torch tensor"""
+    if isinstance(model, OnnxBlipCaptioner):
+        return torch.from_numpy(model.encode(pixel_values))
+    with torch.no_grad():
+        return model.vision_model(pixel_values=pixel_values)[0]
+
+def generate_from_embeds(model, image_embeds, input_ids, max_new_tokens=30):
+    """Decode a caption from cached image embeddings, continuing the tokenized prompt in input_ids.
+
+    Mirrors BlipForConditionalGeneration.generate: the leading [CLS] becomes the
+    decoder BOS token and the trailing [SEP] is dropped.
+    """
+    onnx = isinstance(model, OnnxBlipCaptioner)
+    input_ids = input_ids.clone()
+    input_ids[:, 0] = model.bos_token_id if onnx else model.config.text_config.bos_token_id
+    input_ids = input_ids[:, :-1]
+
+    if onnx:
+        return model.generate(image_embeds=image_embeds.numpy(), input_ids=input_ids.numpy(),
+                              max_new_tokens=max_new_tokens)
+
+    text_config = model.config.text_config
+    image_attention_mask = torch.ones(image_embeds.size()[:-1], dtype=torch.long)
+    return model.text_decoder.generate(input_ids=input_ids,
+                                       eos_token_id=text_config.sep_token_id,
+                                       pad_token_id=text_config.pad_token_id,
+                                       encoder_hidden_states=image_embeds,
+                                       encoder_attention_mask=image_attention_mask,
+                                       max_new_tokens=max_new_tokens)
+
+def model_bytes(model):
+    """Bytes held by a loaded backend model (weights, buffers or exported graphs)"""
+    if hasattr(model, "nbytes"):
+        return model.nbytes
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        for tensor in tensors:
+            if torch.is_tensor(tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
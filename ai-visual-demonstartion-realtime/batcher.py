@@ -0,0 +1,87 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class CaptionBatcher:
+    """Groups concurrent single-frame caption requests into batched generate calls.
+
+    The first waiting request opens a window of max_wait_ms; everything that
+    arrives within it (up to max_batch_size frames) is captioned together and
+    each caller gets its own caption back. A describer with submit() (the
+    InferencePool) gets up to max_in_flight batches at once, so every worker
+    process has work; frames wait in the queue while all of them are busy.
+    """
+
+    def __init__(self, describer, max_batch_size=8, max_wait_ms=20, max_in_flight=1):
+        self.describer = describer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.slots = threading.Semaphore(max_in_flight)
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.frames = 0
+        threading.Thread(target=self._run, name="caption-batcher", daemon=True).start()
+
+    def submit(self, frame):
+        """Queue an OpenCV (BGR) frame and return a Future for its caption"""
+        future = Future()
+        self.queue.put((frame, future))
+        return future
+
+    def describe(self, frame, timeout=None):
+        return self.submit(frame).result(timeout)
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "mean_batch_size": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "queue_depth": self.depth(),
+        }
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self.slots.acquire()
+            batch = self._collect()
+            self.batches += 1
+            self.frames += len(batch)
+            frames = [frame for frame, _ in batch]
+            try:
+                if hasattr(self.describer, "submit"):
+                    pending = self.describer.submit(frames)
+                    pending.add_done_callback(lambda done, batch=batch: self._resolve(batch, done))
+                else:
+                    self._resolve(batch, captions=self.describer.describe_frames(frames))
+            except Exception as e:
+                self._resolve(batch, error=e)
+
+    def _resolve(self, batch, done=None, captions=None, error=None):
+        """Hand each caller its caption (or the error) and free the batch's slot"""
+        self.slots.release()
+        if done is not None:
+            error = done.exception()
+            captions = None if error else done.result()
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(captions[index])
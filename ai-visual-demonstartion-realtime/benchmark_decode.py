@@ -0,0 +1,35 @@
+"""Compare decode time of the frame reading strategies used by VideoDescriber.
+
+Usage: python benchmark_decode.py path/to/video.mp4 [frame_interval]
+Only decoding is timed, no captioning model is loaded.
+"""
+import sys
+import time
+import cv2
+from video_processor import DECODE_MODES, iter_frames
+
+def time_decode(video_path, frame_interval, decode):
+    cap = cv2.VideoCapture(video_path)
+    start = time.perf_counter()
+    frames = sum(1 for _ in iter_frames(cap, frame_interval, decode))
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return frames, elapsed
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    video_path = sys.argv[1]
+    frame_interval = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    results = {decode: time_decode(video_path, frame_interval, decode) for decode in DECODE_MODES}
+    baseline = results["sequential"][1]
+
+    print(f"{'mode':<12}{'frames':>8}{'seconds':>10}{'speedup':>10}")
+    for decode, (frames, elapsed) in results.items():
+        speedup = baseline / elapsed if elapsed else float("inf")
+        print(f"{decode:<12}{frames:>8}{elapsed:>10.3f}{speedup:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
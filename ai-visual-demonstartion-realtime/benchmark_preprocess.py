@@ -0,0 +1,56 @@
+"""Compare FramePreprocessor against BlipProcessor's image preprocessing.
+
+Usage: python benchmark_preprocess.py [batch_size] [frame_width] [frame_height]
+Times both paths on random OpenCV frames and reports how far apart the
+resulting pixel_values are.
+"""
+import sys
+import time
+import cv2
+import numpy as np
+from transformers import BlipImageProcessor
+from model_registry import DEFAULT_MODEL
+from preprocess import FramePreprocessor
+
+ROUNDS = 20
+
+def smooth_frames(count, width, height):
+    """Random but image-like frames (blurred noise), pure noise exaggerates resampling differences"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        frames.append(cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC))
+    return frames
+
+def timed(fn, frames):
+    fn(frames)  # Warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(frames)
+    return (time.perf_counter() - start) / ROUNDS, result
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 640
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 480
+    frames = smooth_frames(batch_size, width, height)
+
+    image_processor = BlipImageProcessor.from_pretrained(DEFAULT_MODEL)
+    fast = FramePreprocessor.from_processor(image_processor)
+
+    def reference(batch):
+        images = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in batch]
+        return image_processor(images=images, return_tensors="np")["pixel_values"]
+
+    ref_seconds, ref_values = timed(reference, frames)
+    fast_seconds, fast_values = timed(lambda batch: fast(batch).copy(), frames)
+    diff = np.abs(ref_values - fast_values)
+
+    print(f"{batch_size} frames of {width}x{height}, mean of {ROUNDS} rounds")
+    print(f"BlipProcessor      {ref_seconds * 1000:8.1f} ms")
+    print(f"FramePreprocessor  {fast_seconds * 1000:8.1f} ms  ({ref_seconds / fast_seconds:.1f}x)")
+    print(f"pixel_values difference: max {diff.max():.4f}, mean {diff.mean():.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class CaptionCache:
+    """Two tier (memory LRU + size-capped SQLite) cache of finished descriptions"""
+
+    def __init__(self, db_path="caption_cache.db", max_memory_entries=512, max_disk_bytes=256 * 1024 * 1024):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS captions (
+                               key TEXT PRIMARY KEY,
+                               value TEXT NOT NULL,
+                               size INTEGER NOT NULL,
+                               accessed REAL NOT NULL)""")
+        self.db.commit()
+
+    @staticmethod
+    def make_key(content_hash, model_name, settings, lang):
+        """Build a cache key from everything that changes the output"""
+        raw = json.dumps([content_hash, model_name, settings, lang], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+            row = self.db.execute("SELECT value FROM captions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE captions SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        data = json.dumps(value)
+        with self.lock:
+            self._remember(key, value)
+            self.db.execute("INSERT OR REPLACE INTO captions (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                            (key, data, len(data), time.time()))
+            self._evict_disk()
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            disk_entries, disk_bytes = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM captions").fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self.memory),
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+            }
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drop least recently used rows until the table fits in max_disk_bytes"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM captions").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM captions ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            self.db.execute("DELETE FROM captions WHERE key = ?", (key,))
+            total -= size
+
+def perceptual_hash(frame, hash_size=8):
+    """64-bit difference hash of an OpenCV (BGR) frame, stable under small noise and compression changes"""
+    import cv2
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+class FrameCaptionCache:
+    """Per-session cache of recent live-frame captions matched by perceptual hash.
+
+    A frame whose hash is within max_distance bits of a caption younger than
+    ttl_seconds reuses that caption instead of running the model again.
+    """
+
+    def __init__(self, max_distance=6, ttl_seconds=10.0, entries_per_session=8, max_sessions=1024):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.entries_per_session = entries_per_session
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id, frame_hash):
+        now = time.monotonic()
+        with self.lock:
+            entries = self.sessions.get(session_id)
+            if entries is not None:
+                self.sessions.move_to_end(session_id)
+                entries[:] = [e for e in entries if now - e[2] <= self.ttl_seconds]
+                for entry_hash, caption, _ in reversed(entries):
+                    if bin(entry_hash ^ frame_hash).count("1") <= self.max_distance:
+                        self.hits += 1
+                        return caption
+            self.misses += 1
+            return None
+
+    def put(self, session_id, frame_hash, caption):
+        with self.lock:
+            entries = self.sessions.setdefault(session_id, [])
+            self.sessions.move_to_end(session_id)
+            entries.append((frame_hash, caption, time.monotonic()))
+            del entries[:-self.entries_per_session]
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "sessions": len(self.sessions)}
+
+class EmbeddingCache:
+    """LRU of vision-encoder outputs per image, bounded by total tensor bytes"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, tensor):
+        size = tensor.numel() * tensor.element_size()
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.numel() * old.element_size()
+            self.entries[key] = tensor
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.numel() * evicted.element_size()
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.bytes}
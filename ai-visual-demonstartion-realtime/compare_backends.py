@@ -0,0 +1,97 @@
+"""Compare captioning backends against the fp32 torch baseline on a fixed image set.
+
+Usage: python compare_backends.py path/to/images [backend ...]
+Reports load time, memory, per-image latency, batched throughput and how
+often each backend's captions agree with the torch fp32 captions.
+"""
+import gc
+import os
+import statistics
+import sys
+import time
+from difflib import SequenceMatcher
+from PIL import Image
+from backends import BACKENDS, load_backend, model_bytes
+from model_registry import DEFAULT_MODEL, _rss_bytes
+
+BATCH_SIZE = 8
+MAX_NEW_TOKENS = 30
+
+def load_images(folder):
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith((".jpg", ".jpeg", ".png")))
+    return [Image.open(os.path.join(folder, n)).convert("RGB") for n in names]
+
+def caption(processor, model, images):
+    inputs = processor(images=images, return_tensors="pt")
+    out = model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS)
+    return processor.batch_decode(out, skip_special_tokens=True)
+
+def run_backend(backend, images, model_name=DEFAULT_MODEL):
+    gc.collect()
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    processor, model = load_backend(backend, model_name)
+    load_seconds = time.perf_counter() - start
+    rss_after = _rss_bytes()
+
+    caption(processor, model, images[:1])  # Warm up
+
+    latencies, captions = [], []
+    for image in images:
+        start = time.perf_counter()
+        captions.extend(caption(processor, model, [image]))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(images), BATCH_SIZE):
+        caption(processor, model, images[i:i + BATCH_SIZE])
+    throughput = len(images) / (time.perf_counter() - start)
+
+    result = {
+        "load_seconds": load_seconds,
+        "model_mb": model_bytes(model) / 2 ** 20,
+        "rss_mb": (rss_after - rss_before) / 2 ** 20 if rss_before is not None else None,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        "images_per_s": throughput,
+        "captions": captions,
+    }
+    del processor, model
+    return result
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    images = load_images(sys.argv[1])
+    if not images:
+        print(f"No images found in {sys.argv[1]}")
+        sys.exit(1)
+    backends = sys.argv[2:] or list(BACKENDS)
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = run_backend(backend, images)
+        except Exception as e:
+            print(f"{backend}: skipped ({e})")
+
+    # Agreement columns need the torch captions; without them only the timings are reported
+    baseline = results["torch"]["captions"] if "torch" in results else None
+    print(f"{len(images)} images, batch size {BATCH_SIZE}")
+    print(f"{'backend':<8}{'load s':>8}{'model MB':>10}{'RSS MB':>9}{'mean ms':>9}{'p95 ms':>9}"
+          f"{'img/s':>8}" + (f"{'exact':>8}{'similar':>9}" if baseline else ""))
+    for backend, r in results.items():
+        rss = f"{r['rss_mb']:.0f}" if r["rss_mb"] is not None else "n/a"
+        line = (f"{backend:<8}{r['load_seconds']:>8.1f}{r['model_mb']:>10.0f}{rss:>9}{r['mean_ms']:>9.0f}"
+                f"{r['p95_ms']:>9.0f}{r['images_per_s']:>8.2f}")
+        if baseline:
+            exact = sum(a == b for a, b in zip(r["captions"], baseline)) / len(baseline)
+            similar = statistics.mean(SequenceMatcher(None, a, b).ratio() for a, b in zip(r["captions"], baseline))
+            line += f"{exact:>8.0%}{similar:>9.0%}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
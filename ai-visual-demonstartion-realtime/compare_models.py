@@ -0,0 +1,46 @@
+"""Compare the caption models the router can send traffic to on a fixed image set.
+
+Usage: python compare_models.py path/to/images [model ...]
+Defaults to the models in model_router.DEFAULT_ROUTES. Reports load time,
+memory, per-image latency, batched throughput and how closely each model's
+captions match those of the first (reference) model.
+"""
+import statistics
+import sys
+from difflib import SequenceMatcher
+from compare_backends import BATCH_SIZE, load_images, run_backend
+from model_router import DEFAULT_ROUTES, LARGE_MODEL
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    images = load_images(sys.argv[1])
+    if not images:
+        print(f"No images found in {sys.argv[1]}")
+        sys.exit(1)
+    backend = "torch"
+    models = sys.argv[2:] or sorted(set(DEFAULT_ROUTES.values()), key=lambda m: m != LARGE_MODEL)
+
+    results = {}
+    for model_name in models:
+        try:
+            results[model_name] = run_backend(backend, images, model_name)
+        except Exception as e:
+            print(f"{model_name}: skipped ({e})")
+    if not results:
+        sys.exit(1)
+
+    reference = next(iter(results.values()))["captions"]
+    width = max(len(m) for m in results) + 2
+    print(f"{len(images)} images, batch size {BATCH_SIZE}, backend {backend}, reference {next(iter(results))}")
+    print(f"{'model':<{width}}{'load s':>8}{'model MB':>10}{'RSS MB':>9}{'mean ms':>9}{'p95 ms':>9}"
+          f"{'img/s':>8}{'similar':>9}")
+    for model_name, r in results.items():
+        similar = statistics.mean(SequenceMatcher(None, a, b).ratio() for a, b in zip(r["captions"], reference))
+        rss = f"{r['rss_mb']:.0f}" if r["rss_mb"] is not None else "n/a"
+        print(f"{model_name:<{width}}{r['load_seconds']:>8.1f}{r['model_mb']:>10.0f}{rss:>9}{r['mean_ms']:>9.0f}"
+              f"{r['p95_ms']:>9.0f}{r['images_per_s']:>8.2f}{similar:>9.0%}")
+
+if __name__ == "__main__":
+    main()
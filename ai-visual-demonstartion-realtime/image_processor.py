@@ -1,20 +1,138 @@
-from transformers import BlipProcessor, BlipForConditionalGeneration
 from PIL import Image
+from threading import Thread
+from transformers import TextIteratorStreamer
+import cv2
+import hashlib
+import numpy as np
 import torch
+from backends import encode_image, generate_from_embeds
+from caption_cache import EmbeddingCache
+from metrics import stage
+from model_registry import DEFAULT_MODEL, get_model
+from preprocess import FramePreprocessor
+from sampling import LatencyTracker
+
+def decode_image_bytes(data):
+    """Decode an encoded image (JPEG/PNG bytes) to an OpenCV BGR array in memory, None if invalid"""
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
 
 class ImageDescriber:
-    def __init__(self):
+    def __init__(self, model_name=DEFAULT_MODEL, backend="torch", embedding_cache_bytes=256 * 1024 * 1024,
+                 fast_preprocess=True):
         self.device = "cpu"
-        model_name = "Salesforce/blip-image-captioning-base"
-        self.processor = BlipProcessor.from_pretrained(model_name)
-        self.model = BlipForConditionalGeneration.from_pretrained(model_name).to(self.device)
+        self.model_name = model_name
+        self.backend = backend
+        # Shared with every other ImageDescriber in the process
+        self.processor, self.model = get_model(model_name, self.device, backend)
+        self.embedding_cache = EmbeddingCache(embedding_cache_bytes)
+        # Frames skip BlipProcessor's per-image PIL pipeline unless fast_preprocess is off
+        self.preprocessor = FramePreprocessor.from_processor(self.processor) if fast_preprocess else None
+        # Rolling per-frame inference time, read by SamplingController to pace streams
+        self.latency = LatencyTracker()
 
-    def describe_image(self, image_path):
+    def describe_image(self, image_path, tier=None):
+        """Caption an image file or stream, with the max_new_tokens / num_beams / image_size of a QualityTier"""
+        max_new_tokens, num_beams, image_size = 30, 1, None  # Reduced for speed
+        if tier is not None:
+            max_new_tokens, num_beams, image_size = tier.max_new_tokens, tier.num_beams, tier.image_size
+        if self.backend == "onnx":
+            # The exported graph runs greedy search at the resolution it was exported with
+            num_beams, image_size = 1, None
         try:
-            raw_image = Image.open(image_path).convert("RGB")
-            inputs = self.processor(raw_image, return_tensors="pt").to(self.device)
-            out = self.model.generate(**inputs, max_new_tokens=30)  # Reduced for speed
-            description = self.processor.decode(out[0], skip_special_tokens=True)
+            with stage("image_decode"):
+                raw_image = Image.open(image_path).convert("RGB")
+            with stage("preprocess"):
+                if image_size:
+                    inputs = self.processor.image_processor(
+                        raw_image, size={"height": image_size, "width": image_size}, return_tensors="pt")
+                else:
+                    inputs = self.processor(raw_image, return_tensors="pt")
+                inputs = inputs.to(self.device)
+            with stage("generate"):
+                options = {"num_beams": num_beams} if num_beams > 1 else {}
+                out = self.latency.timed(
+                    lambda: self.model.generate(**inputs, max_new_tokens=max_new_tokens, **options), 1)
+            with stage("token_decode"):
+                description = self.processor.decode(out[0], skip_special_tokens=True)
             return description
         except Exception as e:
             return f"Error: {str(e)}"
+
+    def _pixel_values(self, frames):
+        """Model input tensor for a list of OpenCV (BGR) frames"""
+        if self.preprocessor is not None:
+            return torch.from_numpy(self.preprocessor(frames)).to(self.device)
+        images = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        return self.processor(images=images, return_tensors="pt")["pixel_values"].to(self.device)
+
+    def describe_frames(self, frames):
+        """Caption a list of OpenCV (BGR) frames with a single batched generate call"""
+        if not frames:
+            return []
+        try:
+            with stage("preprocess"):
+                pixel_values = self._pixel_values(frames)
+            with stage("generate"):
+                out = self.latency.timed(
+                    lambda: self.model.generate(pixel_values=pixel_values, max_new_tokens=30), len(frames))
+            with stage("token_decode"):
+                return self.processor.batch_decode(out, skip_special_tokens=True)
+        except Exception as e:
+            return [f"Error: {str(e)}"] * len(frames)
+
+    def stream_frame(self, frame):
+        """Yield the caption of one OpenCV (BGR) frame piece by piece as tokens are decoded"""
+        streamer = TextIteratorStreamer(self.processor.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
+
+        def run():
+            try:
+                with stage("preprocess"):
+                    pixel_values = self._pixel_values([frame])
+                with stage("generate"):
+                    self.latency.timed(lambda: self.model.generate(
+                        pixel_values=pixel_values, max_new_tokens=30, streamer=streamer), 1)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        Thread(target=run, daemon=True).start()
+        for text in streamer:
+            if text:
+                yield text
+        if errors:
+            yield f"Error: {str(errors[0])}"
+
+    def describe_variants(self, frame, prompts=("",), lengths=(30,), image_key=None):
+        """Caption one OpenCV (BGR) frame for every prompt x max_new_tokens combination.
+
+        The vision encoder runs once per image (cached under image_key, or a hash
+        of the pixels); each variant only costs a text decoder pass.
+        """
+        try:
+            key = image_key or hashlib.md5(frame.tobytes()).hexdigest()
+            image_embeds = self.embedding_cache.get(key)
+            if image_embeds is None:
+                with stage("preprocess"):
+                    pixel_values = self._pixel_values([frame])
+                with stage("encode"):
+                    image_embeds = encode_image(self.model, pixel_values)
+                self.embedding_cache.put(key, image_embeds)
+
+            variants = []
+            for prompt in prompts:
+                input_ids = self.processor(text=prompt, return_tensors="pt").input_ids.to(self.device)
+                for max_new_tokens in lengths:
+                    with stage("generate"):
+                        out = generate_from_embeds(self.model, image_embeds, input_ids, max_new_tokens)
+                    variants.append({
+                        "prompt": prompt,
+                        "max_new_tokens": max_new_tokens,
+                        "description": self.processor.decode(out[0], skip_special_tokens=True),
+                    })
+            return variants
+        except Exception as e:
+            return [{"prompt": p, "max_new_tokens": n, "description": f"Error: {str(e)}"}
+                    for p in prompts for n in lengths]
@@ -0,0 +1,164 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sampling import LatencyTracker
+
+def _core_sets(workers):
+    """Split the CPUs this process may use into one contiguous set per worker"""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cores) // workers)
+    return [cores[(i * per_worker) % len(cores):][:per_worker] for i in range(workers)]
+
+def _worker_main(cores, intra_threads, inter_threads, model_name, backend, requests, results):
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    try:
+        import torch
+        torch.set_num_threads(intra_threads)
+        torch.set_num_interop_threads(inter_threads)
+
+        from image_processor import ImageDescriber
+        describer = ImageDescriber(model_name, backend)
+    except Exception as e:
+        results.put((_FAILED, os.getpid(), str(e)))
+        return
+    results.put((_READY, os.getpid(), None))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, frames = item
+        try:
+            results.put((request_id, describer.describe_frames(frames), None))
+        except Exception as e:
+            results.put((request_id, None, str(e)))
+
+# Request ids of the messages a worker posts once its model has loaded (or failed to)
+_READY = "ready"
+_FAILED = "failed"
+
+class InferencePool:
+    """Caption frames in dedicated worker processes, each pinned to its own cores.
+
+    Every worker loads its own model and runs torch with intra_threads /
+    inter_threads threads, so several pools (e.g. gunicorn workers) don't
+    oversubscribe the machine. describe_frames() matches ImageDescriber, so
+    the pool can stand in for it behind CaptionBatcher.
+    """
+
+    def __init__(self, workers=2, intra_threads=None, inter_threads=1, model_name=None, backend="torch", pin=True):
+        from model_registry import DEFAULT_MODEL
+        self.model_name = model_name or DEFAULT_MODEL
+        self.backend = backend
+        core_sets = _core_sets(workers)
+        if intra_threads is None:
+            intra_threads = len(core_sets[0])
+
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count()
+        self.processes = []
+        self.ready_workers = 0
+        self.load_error = None
+        self.loaded = threading.Event()
+        # Round trip per frame, including queueing between processes
+        self.latency = LatencyTracker()
+        for cores in core_sets:
+            process = context.Process(target=_worker_main, daemon=True,
+                                      args=(cores if pin else None, intra_threads, inter_threads,
+                                            self.model_name, backend, self.requests, self.results))
+            process.start()
+            self.processes.append(process)
+
+        threading.Thread(target=self._dispatch_results, name="inference-results", daemon=True).start()
+
+    def submit(self, frames):
+        """Queue a list of OpenCV (BGR) frames, returns a Future for their captions"""
+        future = Future()
+        if not any(process.is_alive() for process in self.processes):
+            future.set_exception(RuntimeError("No inference worker is running"))
+            return future
+        with self.lock:
+            request_id = next(self.ids)
+            self.pending[request_id] = future
+        started = time.monotonic()
+        future.add_done_callback(lambda done: self.latency.record(time.monotonic() - started, len(frames)))
+        self.requests.put((request_id, frames))
+        return future
+
+    def wait_ready(self):
+        """Block until every worker has loaded its model; raises if one failed or exited while loading"""
+        while not self.loaded.wait(1):
+            for process in self.processes:
+                if not process.is_alive():
+                    raise RuntimeError(f"Inference worker {process.pid} exited with code {process.exitcode} "
+                                       "while loading its model")
+        if self.load_error:
+            raise RuntimeError(f"Inference worker failed to load its model: {self.load_error}")
+
+    def describe_frames(self, frames):
+        if not frames:
+            return []
+        return self.submit(frames).result()
+
+    def depth(self):
+        with self.lock:
+            return len(self.pending)
+
+    def close(self):
+        for _ in self.processes:
+            self.requests.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+
+    def _fail_pending(self, error):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(error)
+
+    def _check_workers(self, dead):
+        """Fail every waiting request once a worker dies; there is no telling which of them it held"""
+        for process in self.processes:
+            if not process.is_alive() and process.pid not in dead:
+                dead.add(process.pid)
+                print(f"Inference worker {process.pid} exited with code {process.exitcode}")
+                self._fail_pending(RuntimeError(f"Inference worker {process.pid} exited"))
+
+    def _dispatch_results(self):
+        dead = set()
+        while True:
+            self._check_workers(dead)
+            try:
+                request_id, captions, error = self.results.get(timeout=1)
+            except queue.Empty:
+                continue
+            if request_id == _READY:
+                self.ready_workers += 1
+                if self.ready_workers == len(self.processes):
+                    self.loaded.set()
+                continue
+            if request_id == _FAILED:
+                self.load_error = error
+                self.loaded.set()
+                continue
+            with self.lock:
+                future = self.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(captions)
@@ -0,0 +1,162 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+class Job:
+    """State of one queued description job, updated by the worker while it runs"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"
+        self.progress = 0.0
+        self.partial = []  # Per-frame captions produced so far
+        self.result = None
+        self.error = None
+        self.tier = None  # Quality tier an image was captioned at
+        self.sampling = None  # Adaptive sampling stats of a video
+        self.created = time.time()
+        self.finished = None
+        self.changed = threading.Condition()
+        self.version = 0  # Bumped on every change, so waiters can tell whether they missed one
+
+    def report(self, progress, new_items=()):
+        with self.changed:
+            if progress is not None:
+                self.progress = min(1.0, progress)
+            self.partial.extend(new_items)
+            self.notify()
+
+    def notify(self):
+        """Wake waiters after a change; call while holding self.changed"""
+        self.version += 1
+        self.changed.notify_all()
+
+    def wait_for_change(self, timeout, version):
+        """Wait until the job changes after the given version (read before looking at its state)"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+
+    def to_dict(self):
+        with self.changed:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "progress": round(self.progress, 3),
+                "partial": list(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "tier": self.tier,
+                "sampling": self.sampling,
+            }
+
+class JobManager:
+    """Queue of description jobs processed by a fixed pool of worker threads.
+
+    Finished jobs are written to results_dir as JSON so clients can fetch them
+    after reconnecting (or after a restart) without reprocessing; the files are
+    deleted once they are older than retention_seconds.
+    """
+
+    def __init__(self, workers=2, results_dir="jobs", keep_seconds=3600, retention_seconds=7 * 24 * 3600):
+        self.queue = queue.Queue()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.results_dir = results_dir
+        self.keep_seconds = keep_seconds
+        self.retention_seconds = retention_seconds
+        self.last_pruned = 0.0
+        os.makedirs(results_dir, exist_ok=True)
+
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+
+    def submit(self, fn, *args):
+        """Queue fn(job, *args); its return value becomes the job result"""
+        job = Job(uuid.uuid4().hex)
+        with self.lock:
+            self._forget_old()
+            self.jobs[job.id] = job
+        self.queue.put((job, fn, args))
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self._load(job_id)
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def _worker(self):
+        while True:
+            job, fn, args = self.queue.get()
+            with job.changed:
+                job.status = "running"
+                job.notify()
+            try:
+                result = fn(job, *args)
+                with job.changed:
+                    job.result = result
+                    job.progress = 1.0
+                    job.status = "done"
+            except Exception as e:
+                with job.changed:
+                    job.error = str(e)
+                    job.status = "failed"
+            with job.changed:
+                job.finished = time.time()
+                job.notify()
+            self._save(job)
+            self.queue.task_done()
+
+    def _path(self, job_id):
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        try:
+            with open(self._path(job.id), "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f)
+        except OSError as e:
+            print(f"Could not store result of job {job.id}: {e}")
+
+    def _load(self, job_id):
+        if not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _forget_old(self):
+        """Drop finished jobs from memory once they are older than keep_seconds (they stay on disk)"""
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < cutoff]:
+            del self.jobs[job_id]
+        # Scanning results_dir is comparatively slow, so do it at most once a minute
+        if time.time() - self.last_pruned >= 60:
+            self.last_pruned = time.time()
+            self._prune_results()
+
+    def _prune_results(self):
+        """Delete stored results older than retention_seconds"""
+        cutoff = time.time() - self.retention_seconds
+        try:
+            entries = list(os.scandir(self.results_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,100 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram, one series per label set"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.series.items()):
+                label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+stage_seconds = Histogram("caption_stage_seconds", "Time spent in each processing stage", ("stage",))
+request_seconds = Histogram("caption_request_seconds", "Request handling time until the response is returned",
+                            ("endpoint",))
+
+class RequestTimings:
+    """Stage durations of one request, in the order they first ran"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def server_timing(self):
+        """Server-Timing header value, e.g. 'upload;dur=1.2, generate;dur=340.5, total;dur=350.0'"""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+_current = ContextVar("request_timings", default=None)
+
+def start_request():
+    """Start collecting stage timings for the request handled in the current context"""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+def current_request():
+    return _current.get()
+
+@contextmanager
+def stage(name):
+    """Time a block with a monotonic clock; feeds the stage histogram and, inside a request, its Server-Timing"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - started
+        stage_seconds.observe((name,), elapsed)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, elapsed)
+
+def gauge(name, help_text, values, label_name=None, metric_type="gauge"):
+    """Prometheus text lines for a gauge (or counter); values is a number or {label value: number}"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    if not isinstance(values, dict):
+        values = {None: values}
+    for label, value in sorted(values.items(), key=lambda item: str(item[0])):
+        if value is None:
+            continue
+        series = f'{name}{{{label_name}="{label}"}}' if label is not None else name
+        lines.append(f"{series} {value}")
+    return lines
@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+from backends import load_backend, model_bytes
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+DEFAULT_MODEL = "Salesforce/blip-image-captioning-base"
+
+_models = {}
+_lock = threading.Lock()
+
+def _rss_bytes():
+    if not PSUTIL_AVAILABLE:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss
+
+def get_model(model_name=DEFAULT_MODEL, device="cpu", backend="torch"):
+    """Return the process-wide (processor, model) pair for model_name, loading it on first use"""
+    key = (model_name, device, backend)
+    entry = _models.get(key)
+    if entry is not None:
+        return entry["processor"], entry["model"]
+
+    with _lock:
+        entry = _models.get(key)
+        if entry is None:
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            processor, model = load_backend(backend, model_name, device)
+            rss_after = _rss_bytes()
+
+            entry = {
+                "processor": processor,
+                "model": model,
+                "load_seconds": time.perf_counter() - start,
+                "parameter_bytes": model_bytes(model),
+                # RSS growth while loading, includes the processor and allocator overhead
+                "rss_delta_bytes": rss_after - rss_before if rss_before is not None else None,
+            }
+            _models[key] = entry
+    return entry["processor"], entry["model"]
+
+def loaded_models():
+    """Memory and load time of every model loaded in this process"""
+    with _lock:
+        return {
+            f"{name}@{device}/{backend}": {
+                "parameter_bytes": entry["parameter_bytes"],
+                "rss_delta_bytes": entry["rss_delta_bytes"],
+                "load_seconds": round(entry["load_seconds"], 2),
+            }
+            for (name, device, backend), entry in _models.items()
+        }
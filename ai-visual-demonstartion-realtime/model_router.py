@@ -0,0 +1,127 @@
+import threading
+from image_processor import ImageDescriber
+from model_registry import DEFAULT_MODEL, loaded_models
+from video_processor import VideoDescriber
+
+LARGE_MODEL = "Salesforce/blip-image-captioning-large"
+
+# Latency-critical live frames get the small model, offline uploads the larger one
+DEFAULT_ROUTES = {
+    "describe": LARGE_MODEL,         # /describe and /jobs uploads (images and videos)
+    "describe_frame": DEFAULT_MODEL,  # /describe-frame, /describe-frame/stream and /realtime
+    "describe_variants": DEFAULT_MODEL,
+}
+
+def parse_routes(spec, defaults=DEFAULT_ROUTES):
+    """Apply 'endpoint=model,endpoint=model' overrides (e.g. from MODEL_ROUTES) to the default routes"""
+    routes = dict(defaults)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        endpoint, sep, model_name = item.partition("=")
+        if not sep or not model_name.strip():
+            raise ValueError(f"Bad model route '{item}', expected endpoint=model")
+        routes[endpoint.strip()] = model_name.strip()
+    return routes
+
+class ModelRouter:
+    """Picks the caption model for each endpoint and creates its describers on first use.
+
+    Describers for the same model share its weights (see model_registry), so
+    routing several endpoints to one model costs no extra memory.
+    """
+
+    def __init__(self, routes=DEFAULT_ROUTES, backend="torch", video_workers=0):
+        self.routes = dict(routes)
+        self.backend = backend
+        self.video_workers = video_workers
+        self.describers = {}
+        self.video_describers = {}
+        self.lock = threading.Lock()
+        self.loading = {}  # Model name -> lock, so one slow load doesn't hold up other models
+        self.background = set()  # Models being loaded by load_in_background
+        self.errors = {}  # Model name -> error of its last failed background load
+
+    def model_for(self, endpoint):
+        return self.routes.get(endpoint, DEFAULT_MODEL)
+
+    def describer(self, endpoint):
+        """ImageDescriber for the endpoint's model, loading the model if this is its first use"""
+        model_name = self.model_for(endpoint)
+        return self._get(self.describers, model_name,
+                         lambda: ImageDescriber(model_name, backend=self.backend))
+
+    def video_describer(self, endpoint):
+        model_name = self.model_for(endpoint)
+        return self._get(self.video_describers, model_name,
+                         lambda: VideoDescriber(workers=self.video_workers, backend=self.backend,
+                                                model_name=model_name))
+
+    def ready(self, endpoint):
+        return self.model_for(endpoint) in self.describers
+
+    def load_in_background(self, endpoint):
+        """Start loading the endpoint's model on a thread unless it is loaded or already loading"""
+        model_name = self.model_for(endpoint)
+        with self.lock:
+            if model_name in self.describers or model_name in self.background:
+                return
+            self.background.add(model_name)
+            self.errors.pop(model_name, None)
+
+        def run():
+            try:
+                self.describer(endpoint)
+            except Exception as e:
+                self.errors[model_name] = str(e)
+                print(f"Loading caption model {model_name} failed: {e}")
+            finally:
+                with self.lock:
+                    self.background.discard(model_name)
+
+        threading.Thread(target=run, name=f"model-loader-{endpoint}", daemon=True).start()
+
+    def status(self):
+        """Per endpoint: its model and whether that model is ready, loading, failed or not loaded yet"""
+        status = {}
+        for endpoint, model_name in sorted(self.routes.items()):
+            if model_name in self.describers:
+                state = "ready"
+            elif model_name in self.background:
+                state = "loading"
+            elif model_name in self.errors:
+                state = f"failed: {self.errors[model_name]}"
+            else:
+                state = "not loaded"
+            status[endpoint] = {"model": model_name, "state": state}
+        return status
+
+    def loaded(self, endpoint):
+        """The endpoint's ImageDescriber if its model is already loaded, else None"""
+        return self.describers.get(self.model_for(endpoint))
+
+    def _get(self, describers, model_name, create):
+        describer = describers.get(model_name)
+        if describer is not None:
+            return describer
+        with self.lock:
+            model_lock = self.loading.setdefault(model_name, threading.Lock())
+        with model_lock:
+            if model_name not in describers:
+                print(f"Loading caption model {model_name}")
+                describers[model_name] = create()
+            return describers[model_name]
+
+    def report(self):
+        """Per model: the endpoints routed to it, rolling per-frame latency and memory once loaded"""
+        memory = {key.split("@")[0]: entry for key, entry in loaded_models().items()
+                  if key.endswith(f"/{self.backend}")}
+        models = {}
+        for endpoint, model_name in sorted(self.routes.items()):
+            model = models.setdefault(model_name, {"endpoints": [], "loaded": model_name in memory})
+            model["endpoints"].append(endpoint)
+        for model_name, model in models.items():
+            describers = [d for d in (self.describers.get(model_name),
+                                      getattr(self.video_describers.get(model_name), "image_describer", None)) if d]
+            latencies = [d.latency.mean() for d in describers if d.latency.mean() is not None]
+            model["mean_latency_ms"] = round(1000 * sum(latencies) / len(latencies), 1) if latencies else None
+            model.update(memory.get(model_name, {}))
+        return {"backend": self.backend, "models": models}
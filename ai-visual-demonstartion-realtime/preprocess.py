@@ -0,0 +1,51 @@
+import threading
+import cv2
+import numpy as np
+
+class FramePreprocessor:
+    """NumPy/OpenCV replacement for BlipImageProcessor on OpenCV (BGR) frames.
+
+    Resizes with cv2.resize, swaps BGR to RGB and rescales/normalizes a whole
+    batch into a reused float32 buffer, giving the same pixel_values as the
+    processor to within resampling differences.
+    """
+
+    def __init__(self, size=(384, 384), mean=(0.48145466, 0.4578275, 0.40821073),
+                 std=(0.26862954, 0.26130258, 0.27577711), rescale_factor=1 / 255):
+        self.height, self.width = size
+        # Folding rescale into the normalization: (x * rescale - mean) / std == x * scale + offset
+        std = np.asarray(std, dtype=np.float32)
+        self.scale = (rescale_factor / std).reshape(3, 1, 1).astype(np.float32)
+        self.offset = (-np.asarray(mean, dtype=np.float32) / std).reshape(3, 1, 1)
+        self.local = threading.local()  # One buffer per thread, callers may run concurrently
+
+    @classmethod
+    def from_processor(cls, processor):
+        """Build from a BlipProcessor (or its image_processor) so the settings always match the model"""
+        image_processor = getattr(processor, "image_processor", processor)
+        size = image_processor.size
+        return cls(size=(size["height"], size["width"]),
+                   mean=image_processor.image_mean,
+                   std=image_processor.image_std,
+                   rescale_factor=image_processor.rescale_factor)
+
+    def _buffer(self, count):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None or buffer.shape[0] < count:
+            buffer = np.empty((count, 3, self.height, self.width), dtype=np.float32)
+            self.local.buffer = buffer
+        return buffer[:count]
+
+    def __call__(self, frames):
+        """Return pixel_values of shape (len(frames), 3, H, W); the array is reused by the next call on this thread"""
+        out = self._buffer(len(frames))
+        for i, frame in enumerate(frames):
+            shrinking = frame.shape[0] > self.height or frame.shape[1] > self.width
+            # INTER_AREA approximates PIL's antialiased bicubic downscale better than INTER_CUBIC
+            resized = cv2.resize(frame, (self.width, self.height),
+                                 interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_CUBIC)
+            # HWC BGR uint8 -> CHW RGB float32
+            out[i] = resized[:, :, ::-1].transpose(2, 0, 1)
+        out *= self.scale
+        out += self.offset
+        return out
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+
+class QualityTier:
+    """Generation settings for one quality level; image_size None keeps the model's native resolution"""
+
+    def __init__(self, name, max_new_tokens, num_beams=1, image_size=None):
+        self.name = name
+        self.max_new_tokens = max_new_tokens
+        self.num_beams = num_beams
+        self.image_size = image_size
+
+    def to_dict(self):
+        return {"name": self.name, "max_new_tokens": self.max_new_tokens,
+                "num_beams": self.num_beams, "image_size": self.image_size}
+
+# Best first; "standard" matches the settings used before tiers existed
+QUALITY_TIERS = [
+    QualityTier("high", max_new_tokens=40, num_beams=3),
+    QualityTier("standard", max_new_tokens=30),
+    QualityTier("fast", max_new_tokens=20, image_size=288),
+    QualityTier("minimal", max_new_tokens=12, image_size=224),
+]
+
+# (high_p95, low_p95) seconds per image at the top tier on CPU; larger models need looser marks
+MODEL_LATENCY_TARGETS = {
+    "Salesforce/blip-image-captioning-base": (3.0, 1.0),
+    "Salesforce/blip-image-captioning-large": (8.0, 3.0),
+}
+
+class QualityScheduler:
+    """Steps image captioning down a quality tier under load and back up once it eases.
+
+    Load is the queue depth reported by queue_depth() and the p95 of recent
+    caption latencies. Crossing either high mark moves one tier down; being
+    under both low marks moves one tier up, but never above top_tier. Tiers
+    change at most once per cooldown seconds, and latencies recorded at the
+    old tier are forgotten so each tier is judged on its own timings.
+    """
+
+    def __init__(self, queue_depth, tiers=QUALITY_TIERS, top_tier="standard", high_depth=4, low_depth=1,
+                 high_p95=3.0, low_p95=1.0, cooldown=5.0, window=50, min_samples=5):
+        self.queue_depth = queue_depth
+        self.tiers = tiers
+        self.top = [tier.name for tier in tiers].index(top_tier)
+        self.high_depth = high_depth
+        self.low_depth = low_depth
+        self.high_p95 = high_p95
+        self.low_p95 = low_p95
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.index = self.top
+        self.changed_at = 0.0
+        self.steps_down = 0
+        self.steps_up = 0
+        self.lock = threading.Lock()
+
+    @property
+    def top_tier(self):
+        return self.tiers[self.top]
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def p95(self):
+        """95th percentile of the recent latencies, or None until min_samples have been recorded"""
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def current(self):
+        """Re-evaluate the load and return the tier the next request should use"""
+        depth = self.queue_depth()
+        p95 = self.p95()
+        with self.lock:
+            if time.monotonic() - self.changed_at >= self.cooldown:
+                overloaded = depth >= self.high_depth or (p95 is not None and p95 > self.high_p95)
+                # Stepping up needs fresh latencies from the current tier, not just a short queue
+                idle = depth <= self.low_depth and p95 is not None and p95 < self.low_p95
+                if overloaded and self.index < len(self.tiers) - 1:
+                    self._move(1)
+                    self.steps_down += 1
+                elif idle and self.index > self.top:
+                    self._move(-1)
+                    self.steps_up += 1
+            return self.tiers[self.index]
+
+    def _move(self, step):
+        self.index += step
+        self.samples.clear()
+        self.changed_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "tier": self.tiers[self.index].name,
+            "top_tier": self.top_tier.name,
+            "queue_depth": self.queue_depth(),
+            "p95_seconds": self.p95(),
+            "steps_down": self.steps_down,
+            "steps_up": self.steps_up,
+        }
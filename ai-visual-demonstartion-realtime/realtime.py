@@ -0,0 +1,113 @@
+import threading
+import time
+
+class FrameChannel:
+    """One realtime session; keeps only the newest frame that has not been captioned yet.
+
+    Frames pushed while the model is busy replace the pending one, so a slow
+    model captions the latest frame instead of working through a backlog.
+    """
+
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.pending = None
+        self.next_id = 0
+        self.last_taken = -1
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.listeners = 0
+        self.generation = 0
+        self.last_seen = time.time()
+
+    def push(self, data, frame_id=None):
+        """Store raw frame bytes as the pending frame; returns (frame_id, whether a stale frame was dropped).
+
+        Concurrent posts can arrive out of order, so a frame no newer than the
+        pending or last captioned one is itself dropped instead of replacing it.
+        """
+        with self.changed:
+            if frame_id is None:
+                frame_id = self.next_id
+            self.next_id = max(self.next_id, frame_id + 1)
+            self.received += 1
+            self.last_seen = time.time()
+            newest = max(self.last_taken, self.pending[0] if self.pending is not None else -1)
+            if frame_id <= newest:
+                self.dropped += 1
+                return frame_id, True
+            dropped = self.pending is not None
+            if dropped:
+                self.dropped += 1
+            self.pending = (frame_id, data)
+            self.changed.notify_all()
+        return frame_id, dropped
+
+    def attach(self):
+        """Register a new listener, superseding any earlier one; returns its generation for take()"""
+        with self.changed:
+            self.generation += 1
+            self.changed.notify_all()
+            return self.generation
+
+    def take(self, timeout=None, generation=None):
+        """Wait for the pending frame and claim it; returns (frame_id, data) or None on timeout.
+
+        A listener from an older generation gets None right away and never
+        claims a frame, so a reopened stream gets every frame after it.
+        """
+        with self.changed:
+            superseded = lambda: generation is not None and generation != self.generation
+            self.changed.wait_for(lambda: self.pending is not None or superseded(), timeout)
+            if superseded():
+                return None
+            frame, self.pending = self.pending, None
+            if frame is not None:
+                self.processed += 1
+                self.last_taken = frame[0]
+            self.last_seen = time.time()
+            return frame
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "listeners": self.listeners,
+        }
+
+class ChannelRegistry:
+    """Realtime sessions by id; sessions without a listener are forgotten after idle_seconds"""
+
+    def __init__(self, idle_seconds=60, max_sessions=1024):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def get(self, session_id):
+        with self.lock:
+            channel = self.channels.get(session_id)
+            if channel is None:
+                self._prune()
+                channel = self.channels[session_id] = FrameChannel()
+            return channel
+
+    def _prune(self):
+        now = time.time()
+        for session_id, channel in list(self.channels.items()):
+            if not channel.listeners and now - channel.last_seen > self.idle_seconds:
+                del self.channels[session_id]
+        while len(self.channels) >= self.max_sessions:
+            oldest = min(self.channels, key=lambda s: self.channels[s].last_seen)
+            del self.channels[oldest]
+
+    def stats(self):
+        with self.lock:
+            channels = list(self.channels.values())
+        return {
+            "sessions": len(channels),
+            "received": sum(c.received for c in channels),
+            "processed": sum(c.processed for c in channels),
+            "dropped": sum(c.dropped for c in channels),
+        }
@@ -0,0 +1,65 @@
+import math
+import threading
+import time
+from collections import deque
+
+class LatencyTracker:
+    """Rolling window of per-frame inference time (seconds of generate call per captioned frame)"""
+
+    def __init__(self, window=32):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds, frames=1):
+        if frames:
+            with self.lock:
+                self.samples.append(seconds / frames)
+
+    def timed(self, fn, frames):
+        """Call fn() and record how long it took for the given number of frames"""
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            self.record(time.monotonic() - started, frames)
+
+    def mean(self):
+        with self.lock:
+            return sum(self.samples) / len(self.samples) if self.samples else None
+
+class SamplingController:
+    """Chooses how often a stream is captioned so inference stays within a real-time budget.
+
+    budget is the share of stream time that may be spent on inference: 0.5 means
+    one second of video (or live feed) may cost at most half a second of model
+    time. The interval follows the tracker's rolling latency, so it widens on a
+    slow or busy machine and narrows again when captions get cheaper.
+    """
+
+    def __init__(self, tracker, budget=0.5, min_interval=0.2, max_interval=10.0, default_latency=1.0):
+        self.tracker = tracker
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_latency = default_latency
+
+    def latency(self):
+        latency = self.tracker.mean()
+        return self.default_latency if latency is None else latency
+
+    def interval(self):
+        """Seconds of stream between captioned frames"""
+        return min(self.max_interval, max(self.min_interval, self.latency() / self.budget))
+
+    def frame_interval(self, fps):
+        """The interval in frames for a video running at fps"""
+        return max(1, math.ceil(self.interval() * fps)) if fps > 0 else 1
+
+    def stats(self):
+        interval = self.interval()
+        return {
+            "budget": self.budget,
+            "latency_ms": round(self.latency() * 1000, 1),
+            "interval_ms": round(interval * 1000),
+            "rate_fps": round(1 / interval, 3),
+        }
@@ -0,0 +1,44 @@
+from difflib import SequenceMatcher
+
+def merge_captions(captions, fps, total_frames=0, similarity=0.8):
+    """Merge runs of (near-)identical captions into timed segments.
+
+    captions is a list of (frame number, caption) pairs in frame order. A
+    caption whose SequenceMatcher ratio to the current run's text is at least
+    similarity extends the run; each segment ends where the next one starts
+    (or at the end of the video). Times are in seconds.
+    """
+    if not captions or fps <= 0:
+        return []
+
+    runs = []  # [first frame, text]
+    for frame_number, caption in captions:
+        if runs and SequenceMatcher(None, runs[-1][1], caption).ratio() >= similarity:
+            continue
+        runs.append([frame_number, caption])
+
+    last_frame = max(total_frames, captions[-1][0] + 1)
+    segments = []
+    for i, (first_frame, text) in enumerate(runs):
+        end_frame = runs[i + 1][0] if i + 1 < len(runs) else last_frame
+        segments.append({
+            "start": round(first_frame / fps, 3),
+            "end": round(end_frame / fps, 3),
+            "text": text,
+        })
+    return segments
+
+def _timestamp(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+def to_webvtt(segments):
+    """Render segments as a WebVTT text track, usable as a <track kind="descriptions">"""
+    lines = ["WEBVTT", ""]
+    for i, segment in enumerate(segments, 1):
+        lines.append(str(i))
+        lines.append(f"{_timestamp(segment['start'])} --> {_timestamp(segment['end'])}")
+        lines.append(segment["text"])
+        lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-progress computation.
+
+    Callers can pass a listener to follow the computation's progress: whatever
+    it publish()es under its key goes to every caller waiting on it, and a late
+    caller first gets the updates it missed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.listeners = {}
+        self.updates = {}
+        self.executed = 0
+        self.coalesced = 0  # Calls that waited on another caller's work instead of repeating it
+
+    def do(self, key, fn, listener=None):
+        with self.lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.inflight[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            if listener:
+                self.listeners.setdefault(key, []).append(listener)
+                for args in self.updates.get(key, ()):
+                    listener(*args)
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+                self.listeners.pop(key, None)
+                self.updates.pop(key, None)
+
+    def publish(self, key, *args):
+        """Pass an update from the computation for key to the listeners of every caller waiting on it"""
+        with self.lock:
+            self.updates.setdefault(key, []).append(args)
+            for listener in self.listeners.get(key, ()):
+                listener(*args)
+
+    def stats(self):
+        with self.lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self.inflight)}
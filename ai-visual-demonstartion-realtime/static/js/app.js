@@ -5,7 +5,14 @@ const baseCaption = document.getElementById('baseCaption');
 const translatedCaption = document.getElementById('translatedCaption');
 
 let captureInterval = null;
-let isProcessing = false;
+let captureIntervalMs = 2500;
+let captionEvents = null;
+let nextFrameId = 0;
+let lastCaptionedFrame = -1;
+let reconnectTimer = null;
+let reconnectDelayMs = 1000;
+// Identifies this tab so the server can reuse captions for near-identical frames
+const sessionId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : String(Date.now()) + Math.random();
 
 // Start webcam
 async function startWebcam() {
@@ -18,22 +25,78 @@ async function startWebcam() {
 }
 
 // Start frame capture
-function startCapturing(intervalMs = 2500) {
+function startCapturing(intervalMs = captureIntervalMs) {
+  openCaptionChannel();
+  captureIntervalMs = intervalMs;
+  captureInterval = setInterval(captureFrame, intervalMs);
+}
+
+// Follow the rate the server picked for this stream's inference budget
+function pace(intervalMs) {
+  if (!captureInterval || !intervalMs || Math.abs(intervalMs - captureIntervalMs) < 100) return;
+  clearInterval(captureInterval);
+  captureIntervalMs = intervalMs;
   captureInterval = setInterval(captureFrame, intervalMs);
 }
 
 // Stop frame capture
 function stopCapturing() {
   clearInterval(captureInterval);
+  captureInterval = null;
+  clearTimeout(reconnectTimer);
+  if (captionEvents) captionEvents.close();
+  captionEvents = null;
   baseCaption.innerText = 'Stopped.';
   translatedCaption.innerText = '–';
 }
 
-// Frame capture + caption
-function captureFrame() {
-  if (isProcessing) return;
-  isProcessing = true;
+// Captions come back over one long-lived event stream, tagged with the frame they describe
+function openCaptionChannel() {
+  clearTimeout(reconnectTimer);
+  if (captionEvents) captionEvents.close();
+  const lang = encodeURIComponent(languageSelect.value);
+  const events = new EventSource(`/realtime/${encodeURIComponent(sessionId)}/events?lang=${lang}`);
+  events.onopen = () => { reconnectDelayMs = 1000; };
+  events.onmessage = (message) => showCaption(JSON.parse(message.data));
+  // A non-200 answer (e.g. 503 while the models load) closes an EventSource for good, so reopen it with backoff
+  events.onerror = () => {
+    if (events.readyState !== EventSource.CLOSED || captionEvents !== events) return;
+    reconnectTimer = setTimeout(openCaptionChannel, reconnectDelayMs);
+    reconnectDelayMs = Math.min(reconnectDelayMs * 2, 30000);
+  };
+  captionEvents = events;
+}
+
+function showCaption(result) {
+  if (result.sampling) pace(result.sampling.interval_ms);
+
+  // Ignore captions for frames older than the one already on screen
+  if (result.frame_id <= lastCaptionedFrame) return;
+
+  lastCaptionedFrame = result.frame_id;
+
+  if (result.error) {
+    baseCaption.innerText = 'Error';
+    translatedCaption.innerText = result.error;
+    return;
+  }
 
+  const caption = result.description || 'No description.';
+  baseCaption.innerText = caption;
+
+  // Check if translation is available
+  if (result.translated_description && languageSelect.value !== 'en') {
+    translatedCaption.innerText = result.translated_description;
+  } else {
+    translatedCaption.innerText = '–'; // Hide translated caption if not available
+  }
+
+  // Speak the caption (voiceover)
+  speak(caption);
+}
+
+// Frame capture: push every frame, the server keeps only the newest one it has not captioned yet
+function captureFrame() {
   const canvas = document.createElement('canvas');
   canvas.width = 320;
   canvas.height = 240;
@@ -43,33 +106,17 @@ function captureFrame() {
   canvas.toBlob(async (blob) => {
     const formData = new FormData();
     formData.append('frame', blob, 'frame.jpg');
-    formData.append('lang', languageSelect.value);
+    formData.append('frame_id', nextFrameId++);
 
     try {
-      const response = await fetch('/describe-frame', {
+      const response = await fetch(`/realtime/${encodeURIComponent(sessionId)}/frames`, {
         method: 'POST',
         body: formData
       });
-      const result = await response.json();
-
-      const caption = result.description || 'No description.';
-      baseCaption.innerText = caption;
-
-      // Check if translation is available
-      if (result.translated_description && languageSelect.value !== 'en') {
-        translatedCaption.innerText = result.translated_description;
-      } else {
-        translatedCaption.innerText = '–'; // Hide translated caption if not available
-      }
-
-      // Speak the caption (voiceover)
-      speak(caption);
-
+      if (!response.ok) throw new Error((await response.json()).error || response.statusText);
     } catch (err) {
       baseCaption.innerText = 'Error';
       translatedCaption.innerText = err.message;
-    } finally {
-      isProcessing = false;
     }
   }, 'image/jpeg');
 }
@@ -90,4 +137,7 @@ window.addEventListener('DOMContentLoaded', () => {
   startWebcam();
   startCapturing(); // auto start capturing
   stopBtn.addEventListener('click', stopCapturing);
+  languageSelect.addEventListener('change', () => {
+    if (captionEvents) openCaptionChannel();
+  });
 });
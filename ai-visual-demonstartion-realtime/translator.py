@@ -1,12 +1,73 @@
 from googletrans import Translator
+from caption_cache import CaptionCache
+
+class GoogleBackend:
+    """googletrans backend; packs many short texts into one request, one text per line"""
+    name = "google"
+    max_chars = 4500
 
-class TextTranslator:
     def __init__(self):
         self.translator = Translator()
 
+    def translate_batch(self, texts, target_lang):
+        results = []
+        for chunk in self._chunks(texts):
+            translated = self.translator.translate("\n".join(chunk), dest=target_lang).text.split("\n")
+            if len(translated) != len(chunk):
+                # Line structure got lost, fall back to one request per text for this chunk
+                translated = [self.translator.translate(text, dest=target_lang).text for text in chunk]
+            results.extend(t.strip() for t in translated)
+        return results
+
+    def _chunks(self, texts):
+        chunk, size = [], 0
+        for text in texts:
+            if chunk and size + len(text) + 1 > self.max_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + 1
+        if chunk:
+            yield chunk
+
+class LocalBackend:
+    """Offline stand-in that returns texts unchanged, for tests and machines without network access"""
+    name = "local"
+
+    def translate_batch(self, texts, target_lang):
+        return list(texts)
+
+BACKENDS = {"google": GoogleBackend, "local": LocalBackend}
+
+class TextTranslator:
+    def __init__(self, backend="google", cache=None):
+        self.backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+        # Optional phrase cache (e.g. a CaptionCache) keyed by source text, backend and target language
+        self.cache = cache
+
     def translate(self, text, target_lang="es"):
+        """Translate a string or a list of strings; lists are deduplicated and sent in one batch"""
+        texts = text if isinstance(text, list) else [text]
         try:
-            translated = self.translator.translate(text, dest=target_lang)
-            return translated.text
+            translated = self.translate_many(texts, target_lang)
         except Exception as e:
             return f"Translation error: {str(e)}"
+        return translated if isinstance(text, list) else translated[0]
+
+    def translate_many(self, texts, target_lang):
+        results = {}
+        for source in set(texts):
+            cached = self.cache.get(self._key(source, target_lang)) if self.cache else None
+            if cached is not None:
+                results[source] = cached
+
+        missing = [source for source in dict.fromkeys(texts) if source not in results]
+        if missing:
+            for source, translated in zip(missing, self.backend.translate_batch(missing, target_lang)):
+                results[source] = translated
+                if self.cache:
+                    self.cache.set(self._key(source, target_lang), translated)
+        return [results[source] for source in texts]
+
+    def _key(self, source, target_lang):
+        return CaptionCache.make_key(source, self.backend.name, {}, target_lang)
@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+import uuid
+from flask import Request
+from werkzeug.utils import secure_filename
+
+class UploadTooLarge(Exception):
+    pass
+
+class _HashingMixin:
+    """Hashes and counts bytes as the form parser writes them, refusing more than max_bytes"""
+
+    def _start_hashing(self, max_bytes):
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.max_bytes = max_bytes
+
+    def _track(self, data):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+        self.md5.update(data)
+
+    def hexdigest(self):
+        return self.md5.hexdigest()
+
+class MemorySpool(_HashingMixin, io.BytesIO):
+    """Small uploads stay in memory"""
+    path = None
+
+    def __init__(self, max_bytes):
+        super().__init__()
+        self._start_hashing(max_bytes)
+
+    def write(self, data):
+        self._track(data)
+        return super().write(data)
+
+class SpoolFile(_HashingMixin, io.FileIO):
+    """Large uploads are written chunk by chunk to a uniquely named file in the spool directory"""
+
+    def __init__(self, path, max_bytes):
+        super().__init__(path, "w+")
+        self.path = path
+        self.kept = False
+        self._start_hashing(max_bytes)
+
+    def write(self, data):
+        self._track(data)
+        return super().write(data)
+
+    def keep(self):
+        """Hand the file over to someone else (e.g. a background job) so it outlives the request"""
+        self.kept = True
+        return self.path
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class SpoolingRequest(Request):
+    """Request that streams file uploads into hashing spools instead of werkzeug's temp files.
+
+    Small images stay in memory; everything else goes to spool_dir on disk,
+    so the content hash is known and a video can be read from its spool path
+    without ever holding the whole upload in memory or copying it again.
+    """
+    spool_dir = "spool"
+    max_upload_bytes = 2 * 1024 * 1024 * 1024
+    memory_threshold = 1024 * 1024
+    memory_extensions = (".jpg", ".jpeg", ".png")
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not hasattr(self, "spools"):
+            self.spools = []
+        small = total_content_length is not None and total_content_length <= self.memory_threshold
+        if small and (filename or "").lower().endswith(self.memory_extensions):
+            return MemorySpool(self.max_upload_bytes)
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        name = f"{uuid.uuid4().hex}_{secure_filename(filename or 'upload')}"
+        spool = SpoolFile(os.path.join(self.spool_dir, name), self.max_upload_bytes)
+        self.spools.append(spool)
+        return spool
+
+    def discard_spools(self):
+        """Remove spool files that were not handed over with keep()"""
+        for spool in getattr(self, "spools", []):
+            if not spool.kept:
+                spool.discard()
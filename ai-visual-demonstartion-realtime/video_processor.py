@@ -1,29 +1,233 @@
 import cv2
-from image_processor import ImageDescriber
+import math
+import multiprocessing
 import os
+import torch
+from concurrent.futures import ProcessPoolExecutor
+from image_processor import ImageDescriber
+from model_registry import DEFAULT_MODEL
+from sampling import SamplingController
 
-class VideoDescriber:
-    def __init__(self):
-        self.image_describer = ImageDescriber()
+DECODE_MODES = ("sequential", "grab", "seek")
+SAMPLING_MODES = ("interval", "scene", "adaptive")
 
-    def describe_video(self, video_path, frame_interval=30):
-        cap = cv2.VideoCapture(video_path)
-        descriptions = []
-        frame_count = 0
+def iter_frames(cap, stride=1, decode="sequential", start=0, end=None):
+    """Yield (frame number, frame) for every stride-th frame of an open capture.
 
-        while cap.isOpened():
+    sequential decodes and converts every frame, grab skips the colour conversion
+    of unwanted frames, seek jumps straight to each target with CAP_PROP_POS_FRAMES.
+    Frame numbers are absolute, so [start, end) segments line up with a full read.
+    """
+    if decode == "seek":
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total > 0:
+            end = total if end is None else min(end, total)
+            first = -(-start // stride) * stride  # First multiple of stride >= start
+            for index in range(first, end, stride):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield index, frame
+            return
+        decode = "grab"  # Frame count unknown (e.g. some streams), fall back
+
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    index = start
+    while cap.isOpened() and (end is None or index < end):
+        if decode == "grab":
+            if not cap.grab():
+                break
+            if index % stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield index, frame
+        else:
             ret, frame = cap.read()
             if not ret:
                 break
+            if index % stride == 0:
+                yield index, frame
+        index += 1
+
+class SceneChangeDetector:
+    """Flags frames whose downscaled colour histogram differs from the last keyframe"""
+
+    def __init__(self, threshold=0.3, min_gap=5, max_gap=150, size=(64, 36)):
+        self.threshold = threshold
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.size = size
+        self.last_hist = None
+        self.last_index = None
+
+    def _histogram(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        # Value is included so cuts between differently lit (or grey) shots register too
+        hist = cv2.calcHist([hsv], [0, 1, 2], None, [8, 4, 4], [0, 180, 0, 256, 0, 256])
+        return cv2.normalize(hist, hist).flatten()
+
+    def is_keyframe(self, index, frame):
+        if self.last_index is not None:
+            gap = index - self.last_index
+            if gap < self.min_gap:
+                return False
+            hist = self._histogram(frame)
+            distance = cv2.compareHist(self.last_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+            if distance < self.threshold and gap < self.max_gap:
+                return False
+        else:
+            hist = self._histogram(frame)
+
+        self.last_hist = hist
+        self.last_index = index
+        return True
+
+# Set in each segment worker process by _init_segment_worker
+_segment_describer = None
+
+def _init_segment_worker(num_threads, backend, model_name):
+    global _segment_describer
+    torch.set_num_threads(num_threads)
+    _segment_describer = VideoDescriber(backend=backend, model_name=model_name)
+
+def _describe_segment(video_path, start, end, options):
+    return _segment_describer.caption_video(video_path, start_frame=start, end_frame=end, **options)
+
+def video_info(video_path):
+    """(fps, frame count) of a video file; either is 0 when the container does not say"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, max(total, 0)
+
+def format_frame(frame_number, caption):
+    return f"Frame {frame_number}: {caption}"
+
+class VideoDescriber:
+    def __init__(self, workers=0, min_segment_frames=900, backend="torch", model_name=DEFAULT_MODEL):
+        self.image_describer = ImageDescriber(model_name, backend=backend)
+        # workers > 1 splits long videos into segments captioned by that many processes
+        self.workers = workers
+        self.min_segment_frames = min_segment_frames
+        self._pool = None
+
+    def describe_video(self, video_path, **options):
+        """Caption the sampled frames of a video as a list of 'Frame N: caption' strings (see caption_video)"""
+        return [format_frame(n, caption) for n, caption in self.caption_video(video_path, **options)]
+
+    def caption_video(self, video_path, frame_interval=30, batch_size=8, mode="interval",
+                      scene_threshold=0.3, min_gap=5, max_gap=150, decode="sequential",
+                      start_frame=0, end_frame=None, progress_callback=None, budget=0.5, controller=None):
+        """Caption the sampled frames of a video as a list of (frame number, caption) pairs.
+
+        mode is interval (every frame_interval-th frame), scene (scene changes) or adaptive,
+        where the interval follows the model's rolling latency so captioning costs at most
+        budget seconds per second of video. Pass a SamplingController as controller to
+        read back the rate adaptive mode settled on.
+
+        progress_callback(frames_done, total_frames, new_descriptions) is called with the
+        new 'Frame N: caption' strings as each batch (or parallel segment) finishes;
+        total_frames is 0 when unknown.
+        """
+        if decode not in DECODE_MODES:
+            raise ValueError(f"Unknown decode mode: {decode}")
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+
+        options = dict(frame_interval=frame_interval, batch_size=batch_size, mode=mode,
+                       scene_threshold=scene_threshold, min_gap=min_gap, max_gap=max_gap, decode=decode)
+        # Adaptive mode paces a single stream against one model, so it is never split across workers
+        if self.workers > 1 and mode != "adaptive" and start_frame == 0 and end_frame is None:
+            segments = self._plan_segments(video_path, frame_interval)
+            if len(segments) > 1:
+                return self._describe_segments(video_path, segments, options, progress_callback)
+
+        cap = cv2.VideoCapture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        descriptions = []
+        batch = []  # (frame number, decoded frame) pairs waiting for the model
 
-            if frame_count % frame_interval == 0:
-                frame_path = f"temp_frame_{frame_count}.jpg"
-                cv2.imwrite(frame_path, frame)
-                desc = self.image_describer.describe_image(frame_path)
-                descriptions.append(f"Frame {frame_count}: {desc}")
-                os.remove(frame_path)
+        if mode == "scene":
+            detector = SceneChangeDetector(scene_threshold, min_gap, max_gap)
+            select = detector.is_keyframe
+            # Keyframes are never closer than min_gap, so skipping decoders only need those candidates
+            stride = 1 if decode == "sequential" else max(1, min_gap)
+        elif mode == "adaptive":
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            if controller is None:
+                controller = SamplingController(self.image_describer.latency, budget)
+            next_frame = [start_frame]
 
-            frame_count += 1
+            def select(index, frame):
+                if index < next_frame[0]:
+                    return False
+                next_frame[0] = index + controller.frame_interval(fps)
+                return True
+            # The interval never drops below min_interval, so skipping decoders only need those candidates
+            stride = 1 if decode == "sequential" else max(1, int(controller.min_interval * fps))
+        else:
+            select = lambda index, frame: True
+            stride = frame_interval
+
+        for frame_count, frame in iter_frames(cap, stride, decode, start_frame, end_frame):
+            if select(frame_count, frame):
+                batch.append((frame_count, frame))
+                if len(batch) >= batch_size:
+                    new_descriptions = self._caption_batch(batch)
+                    descriptions.extend(new_descriptions)
+                    batch = []
+                    if progress_callback:
+                        progress_callback(frame_count + 1, total, [format_frame(*d) for d in new_descriptions])
 
         cap.release()
+        new_descriptions = self._caption_batch(batch)
+        descriptions.extend(new_descriptions)
+        if progress_callback:
+            progress_callback(end_frame or total, total, [format_frame(*d) for d in new_descriptions])
         return descriptions
+
+    def _plan_segments(self, video_path, frame_interval):
+        """Split the video into one [start, end) frame range per worker, aligned to the sampling interval"""
+        cap = cv2.VideoCapture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total <= 0:
+            return [(0, None)]
+
+        count = min(self.workers, total // self.min_segment_frames)
+        if count <= 1:
+            return [(0, None)]
+        size = math.ceil(total / count / frame_interval) * frame_interval
+        return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+    def _describe_segments(self, video_path, segments, options, progress_callback=None):
+        if self._pool is None:
+            num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # spawn so workers don't inherit the parent's torch thread pools
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_segment_worker,
+                                             initargs=(num_threads, self.image_describer.backend,
+                                                       self.image_describer.model_name))
+        futures = [self._pool.submit(_describe_segment, video_path, start, end, options)
+                   for start, end in segments]
+        descriptions = []
+        total = segments[-1][1]
+        for (start, end), future in zip(segments, futures):
+            new_descriptions = future.result()
+            descriptions.extend(new_descriptions)
+            if progress_callback:
+                progress_callback(end, total, [format_frame(*d) for d in new_descriptions])
+        return descriptions
+
+    def _caption_batch(self, batch):
+        """Run one generate call over the buffered frames, returning (frame number, caption) pairs"""
+        if not batch:
+            return []
+        captions = self.image_describer.describe_frames([frame for _, frame in batch])
+        return [(n, desc) for (n, _), desc in zip(batch, captions)]